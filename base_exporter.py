@@ -9,6 +9,7 @@ Consolidates duplicated patterns across echo_export, labs_export, cvc_export:
   - Single/multi-patient export orchestration (xlsx or zip)
 """
 
+import numpy as np
 import pandas as pd
 import openpyxl
 import logging
@@ -21,10 +22,14 @@ logger = logging.getLogger(__name__)
 class BaseExporter:
     """Shared export logic for all clinical data exporters."""
 
-    def __init__(self, df_main, template_path=None, labels_map=None):
+    def __init__(self, df_main, template_path=None, labels_map=None, template_bytes=None):
         self.df_main = df_main
         self.template_path = template_path
         self.labels_map = labels_map or {}
+        # template file contents, read on first load unless the caller already has them
+        self._template_bytes = template_bytes
+        self._row_positions = None  # Screening # -> position of its first df_main row
+        self._row_positions_df = None  # df_main the positions were built from
 
     # ------------------------------------------------------------------
     # Patient data access
@@ -35,10 +40,22 @@ class BaseExporter:
 
         Returns pandas Series or None.
         """
-        rows = self.df_main[self.df_main['Screening #'] == patient_id]
-        if rows.empty:
+        pos = self._patient_row_positions().get(patient_id)
+        if pos is None:
             return None
-        return rows.iloc[0]
+        return self.df_main.iloc[pos]
+
+    def _patient_row_positions(self):
+        """Map each Screening # to its first row position, built once per df_main.
+
+        Replaces a full-column comparison per patient lookup with a dict hit.
+        """
+        if self._row_positions_df is not self.df_main:
+            ids = self.df_main['Screening #']
+            first = ~ids.duplicated()
+            self._row_positions = dict(zip(ids[first], np.flatnonzero(first.to_numpy())))
+            self._row_positions_df = self.df_main
+        return self._row_positions
 
     # ------------------------------------------------------------------
     # Value validation
@@ -115,18 +132,29 @@ class BaseExporter:
     # ------------------------------------------------------------------
 
     def load_template(self):
-        """Load openpyxl Workbook from *self.template_path*.
+        """Load a fresh openpyxl Workbook from *self.template_path*.
+
+        The file is read from disk once per exporter (or not at all when
+        *template_bytes* was passed in); every call parses a new workbook
+        from the cached bytes, so multi-patient exports skip the repeated
+        disk read. External links are not loaded.
 
         Returns Workbook or None on error.
         """
-        if not self.template_path:
+        if not self.template_path and self._template_bytes is None:
             return None
         try:
-            return openpyxl.load_workbook(self.template_path)
+            return openpyxl.load_workbook(BytesIO(self._read_template_bytes()), keep_links=False)
         except Exception as e:
             logger.error("Error loading template %s: %s", self.template_path, e)
             return None
 
+    def _read_template_bytes(self):
+        if self._template_bytes is None:
+            with open(self.template_path, 'rb') as f:
+                self._template_bytes = f.read()
+        return self._template_bytes
+
     # ------------------------------------------------------------------
     # Export orchestration
     # ------------------------------------------------------------------
@@ -149,10 +177,12 @@ class BaseExporter:
             data = self.process_patient(patient_ids[0], **process_kwargs)
             return (data, 'xlsx', patient_ids[0])
 
+        # xlsx files are already deflate-compressed; store them as-is
         zip_buffer = BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_STORED) as zf:
             for pid in patient_ids:
                 data = self.process_patient(pid, **process_kwargs)
                 if data:
                     zf.writestr(filename_fmt(pid), data)
         return (zip_buffer.getvalue(), 'zip', None)
+
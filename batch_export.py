@@ -193,7 +193,11 @@ class BatchExportDialog:
             with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
                 for folder, filename, data in results:
                     arc_path = f"{folder}/{filename}" if folder else filename
-                    zf.writestr(arc_path, data)
+                    # xlsx/zip payloads are already deflate-compressed; store them as-is
+                    if filename.endswith(('.xlsx', '.zip')):
+                        zf.writestr(arc_path, data, compress_type=zipfile.ZIP_STORED)
+                    else:
+                        zf.writestr(arc_path, data)
 
             n_files = len(results)
             self.status_var.set(f"✓ Exported {n_files} files → {zip_name}")
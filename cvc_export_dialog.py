@@ -158,7 +158,8 @@ class CVCExportDialog:
                     from io import BytesIO
 
                     zip_buffer = BytesIO()
-                    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+                    # xlsx files are already deflate-compressed; store them as-is
+                    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_STORED) as zf:
                         for pid in selected_pats:
                             data = exporter.export_to_excel(pid, include_screening, include_hemodynamic)
                             if data:
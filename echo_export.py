@@ -262,24 +262,20 @@ class EchoExporter(BaseExporter):
 
     def get_visits_with_data(self, patient_id):
         """Return list of visits that have data for a patient."""
-        rows = self.df_main[self.df_main['Screening #'] == patient_id]
-        if rows.empty:
+        row = self.get_patient_row(patient_id)
+        if row is None:
             return []
-        row = rows.iloc[0]
         return [v for v in VISIT_ORDER if self.check_visit_has_data(row, v)]
 
     def process_patient(self, patient_id, selected_visits, delete_empty_rows=True):
-        rows = self.df_main[self.df_main['Screening #'] == patient_id]
-        if rows.empty:
+        row = self.get_patient_row(patient_id)
+        if row is None:
             return None
-        row = rows.iloc[0]
 
-        try:
-            wb = openpyxl.load_workbook(self.template_path)
-            ws = wb.active 
-        except Exception as e:
-            logger.error("Error loading template: %s", e)
+        wb = self.load_template()
+        if wb is None:
             return None
+        ws = wb.active
 
         # IMMEDIATELY unmerge DATA cells in columns A and B (row 4+) to prevent MergedCell errors
         # Template has merged cells A4:A14 and B4:B14 that cause issues when writing/deleting
@@ -229,7 +229,11 @@ class FUHighlightsExporter:
         if match:
             interval_hours = int(match.group(1))
             if interval_hours > 0:
-                doses_per_day = 24 // interval_hours
+                # Whole doses within a day; longer intervals are a fraction of a dose per day
+                if interval_hours <= 24:
+                    doses_per_day = 24 // interval_hours
+                else:
+                    doses_per_day = round(24 / interval_hours, 2)
                 return doses_per_day, f"(q{interval_hours}h→{doses_per_day}x/d)", None
         
         # Continuous infusion
@@ -1,10 +1,13 @@
 
 import pandas as pd
-import openpyxl
 from openpyxl.styles import Border, Side, Alignment, Font
 from openpyxl.utils import get_column_letter
+from openpyxl.chart.series import SeriesLabel
+from openpyxl.cell.rich_text import TextBlock, CellRichText
+from openpyxl.cell.text import InlineFont
 import os
 import re
+import math
 import logging
 from datetime import datetime
 from io import BytesIO
@@ -84,6 +87,18 @@ CONVERSION_FACTORS = {
     }
 }
 
+# Generic factors applied when CONVERSION_FACTORS has no parameter-specific entry
+GENERIC_CONVERSION_FACTORS = {
+    ('mg/dl', 'mg/l'): 10.0,
+    ('mg/l', 'mg/dl'): 0.1,
+    # ng/mL to ng/L (and reverse) - Troponin, etc.
+    ('ng/ml', 'ng/l'): 1000.0,
+    ('ng/l', 'ng/ml'): 0.001,
+    # pg/mL to pg/L (and reverse) - NT-proBNP, etc.
+    ('pg/ml', 'pg/l'): 1000.0,
+    ('pg/l', 'pg/ml'): 0.001,
+}
+
 # Unconvertible unit pairs - these cannot be mathematically converted
 # When both are present, display both with color coding
 UNCONVERTIBLE_PAIRS = [
@@ -99,14 +114,66 @@ DUAL_UNIT_COLORS = {
 # Color for out-of-range values
 OUT_OF_RANGE_COLOR = 'FF0000'  # Red
 
+# Lowercased cell text that counts as "no value"
+_BLANK_SENTINELS = frozenset({'', 'nan', 'none'})
+
+# Shared fonts for highlighted values. openpyxl copies a style into the
+# workbook's style table on assignment, so one instance can back every cell.
+_FONT_OOR = Font(color=OUT_OF_RANGE_COLOR)
+_FONT_DUAL_A = Font(color=DUAL_UNIT_COLORS['unit1'])  # Blue
+_FONT_DUAL_B = Font(color=DUAL_UNIT_COLORS['unit2'])  # Green
+_INLINE_FONT_DUAL_A = InlineFont(color=DUAL_UNIT_COLORS['unit1'])
+_INLINE_FONT_DUAL_B = InlineFont(color=DUAL_UNIT_COLORS['unit2'])
+
+
+# Chart index -> parameter shown, for chart titles ("Name (Normal: min-max unit)")
+# and y-axis labels. unit is the fallback when the patient has no display unit.
+# Chart 0: Leukocyte (WBC) - rows 6-7 in Sheet1
+# Chart 1: Creatinin (Cr) - rows 9-10 in Sheet1
+# Chart 2: Platelet (PLT) - rows 12-13 in Sheet1
+# Chart 3: CRP - rows 15-16 in Sheet1
+CHART_INFO = [
+    {'name': 'Leukocyte level', 'param': 'WBC', 'unit': 'K/micl'},
+    {'name': 'Creatinin level', 'param': 'Cr', 'unit': 'mg/dL'},
+    {'name': 'Platelet Count', 'param': 'PLT', 'unit': 'K/micl'},
+    {'name': 'CRP level', 'param': 'CRP', 'unit': 'mg/dL'},
+]
+
+# Chart series reference into Sheet1 ref-range rows, e.g. Sheet1!$B$6:$F$6
+_SHEET1_REF_RE = re.compile(r"Sheet1!\$B\$(\d+):\$[A-Z]+\$(\d+)")
+
+# Chart series reference into a data row, e.g. 'Sheet2'!$G$25:$J$25
+_SHEET2_REF_RE = re.compile(r'\$([A-Z]+)\$(\d+):\$[A-Z]+\$(\d+)')
+
 class LabsExporter(BaseExporter):
-    def __init__(self, df_main, template_path, labels_map, unit_callback=None, highlight_out_of_range=False):
-        super().__init__(df_main, template_path, labels_map)
+    def __init__(self, df_main, template_path, labels_map, unit_callback=None, highlight_out_of_range=False,
+                 template_bytes=None):
+        super().__init__(df_main, template_path, labels_map, template_bytes=template_bytes)
         self.col_cache = {}
+        self._columns = None  # frozenset of df_main columns, see _col_set
+        self._columns_df = None  # df_main that _columns and col_cache were built for
         self.unit_callback = unit_callback
         self.highlight_out_of_range = highlight_out_of_range
         self.param_target_units = {} # param_code -> target_unit
+        self._date_cache = {}  # date string -> Timestamp
+        self._factor_cache = {}  # (source unit, target unit, test code) -> factor or None
+        # chart index -> [(series index, data row)] of the template's Sheet2 data series
+        self._sheet2_series_rows = {}
     
+    @property
+    def _col_set(self):
+        """df_main column names as a frozenset, rebuilt when df_main is replaced.
+
+        Patient rows are df_main rows, so one hashed column set serves both
+        the df_main.columns and row.index membership checks. col_cache is
+        reset along with it, since its lookups depend on the same columns.
+        """
+        if self._columns_df is not self.df_main:
+            self._columns = frozenset(self.df_main.columns)
+            self.col_cache = {}
+            self._columns_df = self.df_main
+        return self._columns
+
     def normalize_unit(self, unit):
         """Normalize unit string for comparison."""
         if not unit:
@@ -149,45 +216,39 @@ class LabsExporter(BaseExporter):
         """Convert value from source_unit to target_unit."""
         if val is None or not source_unit or not target_unit:
             return val
-            
-        s_unit = self.normalize_unit(source_unit)
-        t_unit = self.normalize_unit(target_unit)
         
-        if s_unit == t_unit:
+        # The same few unit pairs recur for every visit of every patient
+        key = (source_unit, target_unit, param_code)
+        try:
+            factor = self._factor_cache[key]
+        except KeyError:
+            factor = self._factor_cache[key] = self._lookup_factor(source_unit, target_unit, param_code)
+        if factor is None:
             return val
             
         num_val = self.to_number(val)
         if num_val is None or isinstance(num_val, str):
             return val
             
-        # Look up conversion factor
-        factors = CONVERSION_FACTORS.get(param_code, {})
-        factor = factors.get((s_unit, t_unit))
+        new_val = num_val * factor
+        # Round to reasonable decimals (e.g. 2 for now, or match input precision?)
+        # For CRP, 1 decimal is usually enough
+        return round(new_val, 2)
+
+    def _lookup_factor(self, source_unit, target_unit, param_code):
+        """Conversion factor between two units, or None if same/unconvertible."""
+        s_unit = self.normalize_unit(source_unit)
+        t_unit = self.normalize_unit(target_unit)
         
-        # Generic conversions if no specific factor found
-        if factor is None:
-            if s_unit == 'mg/dl' and t_unit == 'mg/l':
-                factor = 10.0
-            elif s_unit == 'mg/l' and t_unit == 'mg/dl':
-                factor = 0.1
-            # ng/mL to ng/L (and reverse) - Troponin, etc.
-            elif s_unit == 'ng/ml' and t_unit == 'ng/l':
-                factor = 1000.0
-            elif s_unit == 'ng/l' and t_unit == 'ng/ml':
-                factor = 0.001
-            # pg/mL to pg/L (and reverse) - NT-proBNP, etc.
-            elif s_unit == 'pg/ml' and t_unit == 'pg/l':
-                factor = 1000.0
-            elif s_unit == 'pg/l' and t_unit == 'pg/ml':
-                factor = 0.001
-        
-        if factor is not None:
-            new_val = num_val * factor
-            # Round to reasonable decimals (e.g. 2 for now, or match input precision?)
-            # For CRP, 1 decimal is usually enough
-            return round(new_val, 2)
+        if s_unit == t_unit:
+            return None
             
-        return val
+        # Look up conversion factor, falling back to generic conversions
+        unit_pair = (s_unit, t_unit)
+        factor = CONVERSION_FACTORS.get(param_code, {}).get(unit_pair)
+        if factor is None:
+            factor = GENERIC_CONVERSION_FACTORS.get(unit_pair)
+        return factor
 
     def scan_parameter_units(self, row, prefix_list, lab_type, test_code, num_daily_days):
         """Scan all visits for units of a parameter."""
@@ -241,7 +302,7 @@ class LabsExporter(BaseExporter):
                 continue
                 
             if len(all_found) == 1:
-                resolved_map[template_row] = list(all_found)[0]
+                resolved_map[template_row] = next(iter(all_found))
             else:
                 # Conflict! Check if it's an unconvertible pair
                 is_unconvertible = False
@@ -252,7 +313,7 @@ class LabsExporter(BaseExporter):
                 
                 if is_unconvertible:
                     # Return dual-unit info (no user prompt needed)
-                    units_list = sorted(list(all_found))
+                    units_list = sorted(all_found)
                     resolved_map[template_row] = {
                         'dual': True,
                         'units': units_list,
@@ -260,21 +321,60 @@ class LabsExporter(BaseExporter):
                     }
                 else:
                     if self.unit_callback:
-                        target = self.unit_callback(param_name, sorted(list(all_found)), patient_id)
+                        target = self.unit_callback(param_name, sorted(all_found), patient_id)
                         resolved_map[template_row] = target
                     else:
-                        resolved_map[template_row] = sorted(list(all_found))[0]
+                        resolved_map[template_row] = min(all_found)
         
         return resolved_map
 
     def is_valid_value(self, val):
         """Check if value is valid (not NaN, not empty string, not 'nan' string)."""
-        if pd.isna(val):
+        if val is None:
             return False
-        val_str = str(val).strip().lower()
-        if val_str in ['', 'nan', 'none']:
+        # Fast paths for the dtype=str cells and NaN floats that make up df_main
+        if isinstance(val, str):
+            return val.strip().lower() not in _BLANK_SENTINELS
+        if isinstance(val, float):
+            return not math.isnan(val)
+        if pd.isna(val):
             return False
-        return True
+        return str(val).strip().lower() not in _BLANK_SENTINELS
+    
+    def _visit_value(self, row, prefix, lab_type, test_code, pipe_index, display_unit, is_dual):
+        """(value, normalized unit) of a test at one visit, converted to display_unit.
+        
+        Dual-unit values are returned unconverted. A visit without its own unit
+        is assumed to already be in display_unit.
+        """
+        raw_val = self.get_lab_value(row, prefix, lab_type, test_code, pipe_index=pipe_index)
+        value_unit = self.normalize_unit(self.get_units(row, prefix, lab_type, test_code, pipe_index=pipe_index))
+        if is_dual:
+            return raw_val, value_unit
+        source_unit = value_unit if value_unit else display_unit
+        return self.convert_value(raw_val, source_unit, display_unit, test_code), value_unit
+    
+    def _troponin_visit_value(self, row, prefix, lab_type, test_code, pipe_index, display_unit, is_dual):
+        """(labelled Troponin value, None); same signature as _visit_value."""
+        return self.get_troponin_value(row, prefix, pipe_index=pipe_index), None
+    
+    def _write_cell(self, cell, val, is_text):
+        """Write val as-is for text values, else as a number where it parses as one."""
+        cell.value = val if is_text else self.to_number(val)
+    
+    def _colorize(self, cell, val, unit, oor_range, dual_fonts):
+        """Color a written value: red if outside oor_range, else its dual-unit color.
+        
+        oor_range is (ref_min, ref_max), or None when range highlighting is off.
+        dual_fonts maps each of a dual-unit parameter's units to its font.
+        """
+        # Out-of-range highlighting (red) takes precedence
+        if oor_range is not None and self.is_outside_reference_range(val, *oor_range):
+            cell.font = _FONT_OOR
+            return
+        font = dual_fonts.get(unit)
+        if font is not None:
+            cell.font = font
     
     def is_outside_reference_range(self, value, ref_min, ref_max):
         """Check if a numeric value is outside the reference range.
@@ -314,7 +414,9 @@ class LabsExporter(BaseExporter):
         """Convert string value to number if possible, otherwise return as string."""
         if val is None:
             return None
-        val_str = str(val).strip()
+        if type(val) is int:
+            return val
+        val_str = (val if isinstance(val, str) else str(val)).strip()
         if not val_str or val_str.lower() in ['nan', 'none', 'not done']:
             return val_str if val_str else None
         try:
@@ -326,14 +428,22 @@ class LabsExporter(BaseExporter):
         except ValueError:
             return val_str
     
+    def _parse_date(self, date_str):
+        """pd.to_datetime with a per-exporter cache; visit dates repeat across patients."""
+        dt = self._date_cache.get(date_str)
+        if dt is None:
+            dt = pd.to_datetime(date_str)
+            self._date_cache[date_str] = dt
+        return dt
+
     def get_treatment_date(self, row):
         """Get treatment date from TV_PR_SVDTC column."""
         date_col = "TV_PR_SVDTC"
-        if date_col in row.index:
+        if date_col in self._col_set:
             val = row[date_col]
             if self.is_valid_value(val):
                 try:
-                    return pd.to_datetime(str(val).split('T')[0])
+                    return self._parse_date(str(val).split('T')[0])
                 except (ValueError, TypeError):
                     pass
         return None
@@ -342,7 +452,7 @@ class LabsExporter(BaseExporter):
         """Get list of dates from daily lab columns."""
         for lab_type in ['BMP', 'CBC', 'LFP', 'ENZ', 'COA']:
             date_col = f"TV_LB_{lab_type}_DV_LBDAT_{lab_type}"
-            if date_col in row.index:
+            if date_col in self._col_set:
                 val = row[date_col]
                 if self.is_valid_value(val):
                     return [d.strip() for d in str(val).split('|') if d.strip()]
@@ -363,7 +473,7 @@ class LabsExporter(BaseExporter):
         result = []
         for date_str in daily_dates:
             try:
-                dt = pd.to_datetime(date_str.split('T')[0])
+                dt = self._parse_date(date_str.split('T')[0])
                 day_offset = (dt - treatment_date).days
                 formatted_date = dt.strftime('%d-%b-%Y')
                 result.append((date_str, day_offset, formatted_date))
@@ -373,10 +483,17 @@ class LabsExporter(BaseExporter):
         return result
     
     def find_lab_column(self, prefix, lab_type, test_code, col_type="LBORRES"):
-        """Find the column name for a specific lab test."""
+        """Find the column name for a specific lab test.
+        
+        Results, including misses, are cached: the same names are looked up for
+        every patient, and a miss otherwise rescans all of df_main's columns.
+        """
+        col_set = self._col_set  # resets col_cache if df_main was replaced
         cache_key = (prefix, lab_type, test_code, col_type)
-        if cache_key in self.col_cache:
+        try:
             return self.col_cache[cache_key]
+        except KeyError:
+            pass
         
         # Build possible column name patterns
         patterns = []
@@ -389,7 +506,7 @@ class LabsExporter(BaseExporter):
         patterns.append(f"{prefix}{lab_type}_{col_type}_{test_code}")
         
         for pattern in patterns:
-            if pattern in self.df_main.columns:
+            if pattern in col_set:
                 self.col_cache[cache_key] = pattern
                 return pattern
         
@@ -400,8 +517,24 @@ class LabsExporter(BaseExporter):
                 self.col_cache[cache_key] = col
                 return col
         
+        self.col_cache[cache_key] = None
         return None
     
+    @staticmethod
+    def _pick_pipe(val, pipe_index):
+        """Text of a cell, or its stripped pipe_index-th part for pipe-delimited daily values.
+
+        Cells without a pipe apply to every day and are returned whole.
+        Returns None when pipe_index is past the last part.
+        """
+        val_str = val if isinstance(val, str) else str(val)
+        if pipe_index is None or '|' not in val_str:
+            return val_str
+        parts = val_str.split('|')
+        if pipe_index < len(parts):
+            return parts[pipe_index].strip()
+        return None
+
     def get_lab_value(self, row, prefix, lab_type, test_code, pipe_index=None):
         """Get lab result value, optionally at a specific pipe index."""
         col = self.find_lab_column(prefix, lab_type, test_code, "LBORRES")
@@ -412,25 +545,21 @@ class LabsExporter(BaseExporter):
                 col = f"TV_LB_{lab_type}_DV_eGFR"
             else:
                 col = f"{prefix}{lab_type}_eGFR"
-            if col not in self.df_main.columns:
+            if col not in self._col_set:
                 return None
         
-        if not col or col not in row.index:
+        if not col or col not in self._col_set:
             return None
             
         val = row[col]
         if not self.is_valid_value(val):
             return None
         
-        val_str = str(val)
-        if pipe_index is not None and '|' in val_str:
-            parts = val_str.split('|')
-            if pipe_index < len(parts):
-                part = parts[pipe_index].strip()
-                return part if part and part.lower() not in ['nan', 'none', ''] else None
+        part = self._pick_pipe(val, pipe_index)
+        if part is None:
             return None
-        
-        return val_str.strip()
+        part = part.strip()
+        return part if part.lower() not in _BLANK_SENTINELS else None
     
     def get_troponin_value(self, row, prefix, pipe_index=None):
         """Get Troponin value with type label (T or I)."""
@@ -461,7 +590,8 @@ class LabsExporter(BaseExporter):
         Columns B-F in template correspond to 5 days (baseline through day+4).
         We need to adjust to match num_daily_days and populate with patient's actual ref values.
         """
-        if 'Sheet1' not in wb.sheetnames:
+        sheet_names = wb.sheetnames
+        if 'Sheet1' not in sheet_names:
             return
         
         ws1 = wb['Sheet1']
@@ -483,15 +613,13 @@ class LabsExporter(BaseExporter):
             # Insert additional columns
             extra_cols = total_chart_cols - template_cols
             insert_at = 7  # Column G (after F)
-            
-            for _ in range(extra_cols):
-                ws1.insert_cols(insert_at)
+            # Single shift instead of one full-sheet move per column
+            ws1.insert_cols(insert_at, amount=extra_cols)
         
         elif total_chart_cols < template_cols:
-            # Delete excess columns (from right to left)
+            # Delete excess columns in one shift
             cols_to_delete = template_cols - total_chart_cols
-            for _ in range(cols_to_delete):
-                ws1.delete_cols(2 + total_chart_cols)
+            ws1.delete_cols(2 + total_chart_cols, amount=cols_to_delete)
         
         # Update day labels in row 4 based on day_data
         for idx, (date_str, day_offset, formatted_date) in enumerate(day_data):
@@ -513,52 +641,48 @@ class LabsExporter(BaseExporter):
                      ref_min, ref_max = ref_data
                 
                 if ref_min is not None or ref_max is not None:
+                    # Same value in every column, so convert once
+                    num_min = self.to_number(ref_min)
+                    num_max = self.to_number(ref_max)
                     # Include all columns: daily + Discharge
-                    for col_idx in range(total_chart_cols):
-                        col = 2 + col_idx  # Start at column B
+                    for col in range(2, 2 + total_chart_cols):  # Start at column B
                         if ref_min is not None:
-                            ws1.cell(row=min_row, column=col).value = self.to_number(ref_min)
+                            ws1.cell(row=min_row, column=col, value=num_min)
                         if ref_max is not None:
-                            ws1.cell(row=max_row, column=col).value = self.to_number(ref_max)
+                            ws1.cell(row=max_row, column=col, value=num_max)
         
         # Update chart series formulas to match new column range
         # Check all worksheets for charts (not just Sheet2)
         last_col_letter = get_column_letter(1 + total_chart_cols)  # B + total_chart_cols - 1
+        ref_mid = f":${last_col_letter}$"
         
-        for sheet_name in wb.sheetnames:
-            ws_check = wb[sheet_name]
-            if hasattr(ws_check, '_charts') and ws_check._charts:
-                for chart in ws_check._charts:
-                    for series in chart.series:
-                        if hasattr(series, 'val') and series.val and hasattr(series.val, 'numRef'):
-                            current_ref = series.val.numRef.f
-                            if current_ref and 'Sheet1' in current_ref:
-                                # Update Sheet1 reference to match new column range
-                                import re
-                                # Match pattern like Sheet1!$B$6:$F$6
-                                match = re.search(r"Sheet1!\$B\$(\d+):\$[A-Z]+\$(\d+)", current_ref)
-                                if match:
-                                    row_num = match.group(1)
-                                    new_ref = f"Sheet1!$B${row_num}:${last_col_letter}${row_num}"
-                                    series.val.numRef.f = new_ref
-    
+        # Worksheets and chartsheets that actually hold charts
+        chart_sheets = [sheet for sheet in wb.worksheets + wb.chartsheets if sheet._charts]
+        for ws_check in chart_sheets:
+            for chart in ws_check._charts:
+                for series in chart.series:
+                    num_ref = series.val.numRef if series.val else None
+                    current_ref = num_ref.f if num_ref else None
+                    if current_ref and 'Sheet1' in current_ref:
+                        # Update Sheet1 reference to match new column range
+                        match = _SHEET1_REF_RE.search(current_ref)
+                        if match:
+                            row_num = match.group(1)
+                            num_ref.f = f"Sheet1!$B${row_num}{ref_mid}{row_num}"
+
     def get_lab_status(self, row, prefix, lab_type, test_code, pipe_index=None):
         """Check if lab test was marked as 'not done'."""
         col = self.find_lab_column(prefix, lab_type, test_code, "LBSTAT")
-        if not col or col not in row.index:
+        if not col or col not in self._col_set:
             return None
         
         val = row[col]
         if not self.is_valid_value(val):
             return None
         
-        val_str = str(val)
-        if pipe_index is not None and '|' in val_str:
-            parts = val_str.split('|')
-            if pipe_index < len(parts):
-                val_str = parts[pipe_index].strip()
-            else:
-                return None
+        val_str = self._pick_pipe(val, pipe_index)
+        if val_str is None:
+            return None
         
         val_lower = val_str.lower()
         if val_lower in ['true', 'yes', '1', 'not done', 'not performed']:
@@ -577,13 +701,13 @@ class LabsExporter(BaseExporter):
         # Try Screening visit first
         prefix = "SBV_LB_"
         min_col = self.find_lab_column(prefix, lab_type, test_code, "LBORNRLO")
-        if min_col and min_col in row.index:
+        if min_col and min_col in self._col_set:
             val = row[min_col]
             if self.is_valid_value(val):
                 ref_min = str(val).strip()
         
         max_col = self.find_lab_column(prefix, lab_type, test_code, "LBORNRHI")
-        if max_col and max_col in row.index:
+        if max_col and max_col in self._col_set:
             val = row[max_col]
             if self.is_valid_value(val):
                 ref_max = str(val).strip()
@@ -599,7 +723,7 @@ class LabsExporter(BaseExporter):
             
             if ref_min is None:
                 tv_min_col = self.find_lab_column(tv_prefix, lab_type, test_code, "LBORNRLO")
-                if tv_min_col and tv_min_col in row.index:
+                if tv_min_col and tv_min_col in self._col_set:
                     val = row[tv_min_col]
                     if self.is_valid_value(val):
                         # Take first value from pipe-delimited string
@@ -610,7 +734,7 @@ class LabsExporter(BaseExporter):
             
             if ref_max is None:
                 tv_max_col = self.find_lab_column(tv_prefix, lab_type, test_code, "LBORNRHI")
-                if tv_max_col and tv_max_col in row.index:
+                if tv_max_col and tv_max_col in self._col_set:
                     val = row[tv_max_col]
                     if self.is_valid_value(val):
                         # Take first value from pipe-delimited string
@@ -628,25 +752,21 @@ class LabsExporter(BaseExporter):
     def get_units(self, row, prefix, lab_type, test_code, pipe_index=None):
         """Get units for a lab test."""
         col = self.find_lab_column(prefix, lab_type, test_code, "LBORRESU")
-        if not col or col not in row.index:
+        if not col or col not in self._col_set:
             return None
         
         val = row[col]
         if not self.is_valid_value(val):
             return None
         
-        val_str = str(val)
-        if pipe_index is not None and '|' in val_str:
-            parts = val_str.split('|')
-            if pipe_index < len(parts):
-                val_str = parts[pipe_index].strip()
-            else:
-                return None
+        val_str = self._pick_pipe(val, pipe_index)
+        if val_str is None:
+            return None
         
         # Handle "Other" units
         if val_str.lower() == "other":
             oth_col = self.find_lab_column(prefix, lab_type, test_code, "LBORRESU_OTH")
-            if oth_col and oth_col in row.index:
+            if oth_col and oth_col in self._col_set:
                 oth_val = row[oth_col]
                 if self.is_valid_value(oth_val):
                     return str(oth_val).strip()
@@ -660,7 +780,7 @@ class LabsExporter(BaseExporter):
         try:
             if '|' in str(date_str):
                 date_str = str(date_str).split('|')[0].strip()
-            dt = pd.to_datetime(date_str)
+            dt = self._parse_date(date_str)
             return dt.strftime('%d-%b-%Y')
         except (ValueError, TypeError):
             return str(date_str).split('T')[0] if 'T' in str(date_str) else str(date_str)
@@ -679,157 +799,169 @@ class LabsExporter(BaseExporter):
         
         return header
     
-    def copy_column_format(self, ws, source_col, target_col, max_row=41):
-        """Copy cell formatting from source column to target column."""
+    def copy_column_format(self, ws, source_col, target_cols, max_row=41):
+        """Copy cell formatting from source column to each of the target columns."""
         from copy import copy
+        # Read the source styles once; openpyxl stores style objects by index,
+        # so the same copies can be assigned to every target cell.
+        source_styles = []
         for row_num in range(1, max_row + 1):
             source_cell = ws.cell(row=row_num, column=source_col)
-            target_cell = ws.cell(row=row_num, column=target_col)
-            
-            # Copy styles
             if source_cell.has_style:
-                target_cell.font = copy(source_cell.font)
-                target_cell.border = copy(source_cell.border)
-                target_cell.fill = copy(source_cell.fill)
-                target_cell.number_format = copy(source_cell.number_format)
-                target_cell.protection = copy(source_cell.protection)
-                target_cell.alignment = copy(source_cell.alignment)
+                source_styles.append((row_num, copy(source_cell.font), copy(source_cell.border),
+                                      copy(source_cell.fill), source_cell.number_format,
+                                      copy(source_cell.protection), copy(source_cell.alignment)))
+        
+        for target_col in target_cols:
+            for row_num, font, border, fill, number_format, protection, alignment in source_styles:
+                target_cell = ws.cell(row=row_num, column=target_col)
+                target_cell.font = font
+                target_cell.border = border
+                target_cell.fill = fill
+                target_cell.number_format = number_format
+                target_cell.protection = protection
+                target_cell.alignment = alignment
     
-    def update_chart_labels(self, ws, patient_id, chart_ref_values):
-        """Update chart titles with real reference ranges and series names with patient ID.
+    def _finalize_sheet_and_charts(self, wb, ws, patient_id, num_daily_days, day_data, chart_ref_values):
+        """Fit Sheet1 to the daily columns, then update ws's charts in one pass.
         
-        Chart 0: Leukocyte (WBC) - rows 6-7 in Sheet1
-        Chart 1: Creatinin (Cr) - rows 9-10 in Sheet1
-        Chart 2: Platelet (PLT) - rows 12-13 in Sheet1
-        Chart 3: CRP - rows 15-16 in Sheet1
-        """
-        
-        if not hasattr(ws, '_charts') or not ws._charts:
-            return
-        
-        # Map chart index to parameter info
-        # Chart titles: "Parameter\nNormal values: min-max [units]"
-        chart_info = [
-            {'name': 'Leukocyte level', 'param': 'WBC', 'unit': 'K/micl'},
-            {'name': 'Creatinin level', 'param': 'Cr', 'unit': 'mg/dL'},
-            {'name': 'Platelet Count', 'param': 'PLT', 'unit': 'K/micl'},
-            {'name': 'CRP level', 'param': 'CRP', 'unit': 'mg/dL'},
-        ]
-        
-        for chart_idx, chart in enumerate(ws._charts):
-            if chart_idx >= len(chart_info):
-                break
-            
-            info = chart_info[chart_idx]
-            # Unpack 3 values: min, max, unit (or default to None)
-            ref_data = chart_ref_values.get(info['param'], (None, None, None))
-            if len(ref_data) == 3:
-                ref_min, ref_max, ref_unit = ref_data
-            else:
-                ref_min, ref_max = ref_data
-                ref_unit = None
-            
-            # Use dynamic unit if available, otherwise fallback to default
-            display_unit = ref_unit if ref_unit else info['unit']
-            
-            try:
-                # Update chart title with real reference values
-                # Set overlay=False to use "Above Chart" positioning instead of "Centered Overlay"
-                if ref_min is not None and ref_max is not None:
-                    # Current format: "Name (Normal: min-max unit)"
-                    # Note: User's screenshot showed "Normal values:", which implies this code wasn't running
-                    # or failing.
-                    new_title = f"{info['name']} (Normal: {ref_min}-{ref_max} {display_unit})"
-                    chart.title = new_title
-                    # Set overlay to False
-                    if hasattr(chart, 'title') and chart.title is not None:
-                        chart.title.overlay = False
-                
-                # Update Y-Axis Title if present
-                if hasattr(chart, 'y_axis') and chart.y_axis and chart.y_axis.title:
-                    axis_title = f"{info['param']} [{display_unit}]"
-                    chart.y_axis.title = axis_title
-                    # Fix overlap like we did for main title
-                    try:
-                        chart.y_axis.title.overlay = False
-                    except AttributeError:
-                        pass
-
-                # Update first series name (RE -> patient_id) using SeriesLabel
-                from openpyxl.chart.series import SeriesLabel
-                if chart.series and len(chart.series) > 0:
-                    chart.series[0].tx = SeriesLabel(v=str(patient_id))
-                    
-            except Exception as e:
-                logger.error("Error updating chart %d labels: %s", chart_idx, e)
-
-    
-    def update_charts(self, ws, num_daily_days, day_data):
-        """Update chart data ranges for peri-procedural data including Discharge.
-        
-        Charts show daily data (columns 7 to 7+num_daily_days-1) PLUS Discharge column.
-        Not Screening (col 6) or follow-up visits.
-        
-        Instead of rebuilding charts, we update the data references of existing series.
+        Each chart gets its labels (titles and series name) and its data
+        ranges (peri-procedural data including Discharge) updated together.
         """
         from openpyxl.chart import Reference
-        from openpyxl.chart.series import SeriesLabel
         
-        if not hasattr(ws, '_charts') or not ws._charts:
+        # Update Sheet1 reference range columns to match daily column count
+        self.update_sheet1_columns(wb, num_daily_days, day_data, chart_ref_values)
+        
+        if not ws._charts:
             return
         
+        pid_str = str(patient_id)
+        
         # Data range: columns 7 to discharge_col (inclusive)
         # Layout: G(7)=Day-1, ... | Discharge | 30D...
         min_col = 7  # Start at Baseline
         discharge_col = 7 + num_daily_days  # Discharge column is right after daily
         max_col = discharge_col  # Include Discharge in charts
         
-        # Update each chart's series to use the correct column range
+        # Invariant across charts and series; only the data row varies.
+        # New reference: '<sheet>'!$<min>$<row>:$<max>$<row>
+        ref_prefix = f"'{ws.title}'!${get_column_letter(min_col)}$"
+        ref_mid = f":${get_column_letter(max_col)}$"
+        
+        # Category (x-axis) labels: the row 1 headers over the same columns, shared by every chart
+        cat_ref = Reference(ws, min_col=min_col, max_col=max_col, min_row=1, max_row=1)
+        
         for chart_idx, chart in enumerate(ws._charts):
-            try:
-                # Update each existing series to reference correct column range
-                # ONLY update Sheet2 data series, NOT Sheet1 reference range series
-                for series in chart.series:
-                    if hasattr(series, 'val') and series.val and hasattr(series.val, 'numRef'):
-                        current_ref = series.val.numRef.f
-                        if current_ref:
-                            # Skip Sheet1 references (these are constant ref range lines)
-                            if 'Sheet1' in current_ref:
-                                continue
-                            
-                            # Parse the row from Sheet2 reference
-                            import re
-                            match = re.search(r'\$([A-Z]+)\$(\d+):\$[A-Z]+\$(\d+)', current_ref)
-                            if match:
-                                data_row = int(match.group(2))
-                                # Create new reference with updated column range
-                                sheet_name = ws.title
-                                min_col_letter = get_column_letter(min_col)
-                                max_col_letter = get_column_letter(max_col)
-                                new_ref = f"'{sheet_name}'!${min_col_letter}${data_row}:${max_col_letter}${data_row}"
-                                series.val.numRef.f = new_ref
-                
-                # Update category (x-axis) labels
-                cat_ref = Reference(ws, min_col=min_col, max_col=max_col, 
-                                   min_row=1, max_row=1)
-                chart.set_categories(cat_ref)
+            if chart_idx < len(CHART_INFO):
+                self._update_chart_labels(chart_idx, chart, pid_str, chart_ref_values)
+            self._update_chart_data(chart_idx, chart, ref_prefix, ref_mid, cat_ref)
+    
+    def _update_chart_labels(self, chart_idx, chart, pid_str, chart_ref_values):
+        """Update a chart's title with the real reference range and its series name with the patient ID."""
+        info = CHART_INFO[chart_idx]
+        # Unpack 3 values: min, max, unit (or default to None)
+        ref_data = chart_ref_values.get(info['param'], (None, None, None))
+        if len(ref_data) == 3:
+            ref_min, ref_max, ref_unit = ref_data
+        else:
+            ref_min, ref_max = ref_data
+            ref_unit = None
+        
+        # Use dynamic unit if available, otherwise fallback to default
+        display_unit = ref_unit if ref_unit else info['unit']
+        
+        try:
+            # Update chart title with real reference values
+            # Set overlay=False to use "Above Chart" positioning instead of "Centered Overlay"
+            if ref_min is not None and ref_max is not None:
+                # Current format: "Name (Normal: min-max unit)"
+                # Note: User's screenshot showed "Normal values:", which implies this code wasn't running
+                # or failing.
+                new_title = f"{info['name']} (Normal: {ref_min}-{ref_max} {display_unit})"
+                chart.title = new_title
+                # Set overlay to False (assigning a string always creates a Title)
+                chart.title.overlay = False
+            
+            # Update Y-Axis Title if present (charts without axes, e.g. pie, have no y_axis)
+            y_axis = getattr(chart, 'y_axis', None)
+            if y_axis is not None and y_axis.title:
+                y_axis.title = f"{info['param']} [{display_unit}]"
+                # Fix overlap like we did for main title
+                y_axis.title.overlay = False
+
+            # Update first series name (RE -> patient_id)
+            if chart.series:
+                tx = chart.series[0].tx
+                # A literal label can be renamed in place; a cell-reference label is replaced
+                if tx is not None and tx.strRef is None:
+                    tx.v = pid_str
+                else:
+                    chart.series[0].tx = SeriesLabel(v=pid_str)
                 
-            except Exception as e:
-                logger.error("Error updating chart %d: %s", chart_idx, e)
+        except Exception as e:
+            logger.error("Error updating chart %d labels: %s", chart_idx, e)
     
-    def process_patient(self, patient_id, delete_empty_cols=True):
-        """Process a single patient and generate Excel output."""
-        rows = self.df_main[self.df_main['Screening #'] == patient_id]
-        if rows.empty:
-            return None
-        row = rows.iloc[0]
+    @staticmethod
+    def _find_sheet2_series(chart):
+        """(series index, data row) for each series of chart that plots a Sheet2 row.
         
+        The template, and so its series references, is the same for every
+        patient, so _update_chart_data works this out once per chart.
+        """
+        series_rows = []
+        for series_idx, series in enumerate(chart.series):
+            num_ref = series.val.numRef if series.val else None
+            current_ref = num_ref.f if num_ref else None
+            # Skip Sheet1 references (these are constant ref range lines)
+            if not current_ref or 'Sheet1' in current_ref:
+                continue
+            # Parse the row from Sheet2 reference
+            match = _SHEET2_REF_RE.search(current_ref)
+            if match:
+                series_rows.append((series_idx, int(match.group(2))))
+        return series_rows
+    
+    def _update_chart_data(self, chart_idx, chart, ref_prefix, ref_mid, cat_ref):
+        """Point a chart's data series and categories at the daily + Discharge columns.
+        
+        Charts show daily data PLUS the Discharge column, not Screening or
+        follow-up visits. Instead of rebuilding charts, we update the data
+        references of existing series.
+        """
         try:
-            wb = openpyxl.load_workbook(self.template_path)
-            ws = wb.active
+            # Update each existing series to reference correct column range
+            # ONLY update Sheet2 data series, NOT Sheet1 reference range series
+            series_rows = self._sheet2_series_rows.get(chart_idx)
+            if series_rows is None:
+                series_rows = self._sheet2_series_rows[chart_idx] = self._find_sheet2_series(chart)
+            for series_idx, data_row in series_rows:
+                # Create new reference with updated column range
+                chart.series[series_idx].val.numRef.f = f"{ref_prefix}{data_row}{ref_mid}{data_row}"
+            
+            # Update category (x-axis) labels
+            chart.set_categories(cat_ref)
+            
         except Exception as e:
-            logger.error("Error loading template: %s", e)
+            logger.error("Error updating chart %d: %s", chart_idx, e)
+    
+    def process_patient(self, patient_id, delete_empty_cols=True, out=None):
+        """Process a single patient and generate Excel output.
+
+        Returns the xlsx bytes, or writes them straight into *out* (a binary
+        file object) and returns True. Returns None when there is nothing to
+        export.
+        """
+        row = self.get_patient_row(patient_id)
+        if row is None:
             return None
+        # The helpers below only index the row, and dict lookups are far cheaper than Series ones
+        row = row.to_dict()
+        
+        wb = self.load_template()
+        if wb is None:
+            return None
+        ws = wb.active
         
         # Calculate day offsets from treatment date
         day_data = self.calculate_day_offsets(row)
@@ -866,20 +998,25 @@ class LabsExporter(BaseExporter):
             # Insert additional columns
             extra_cols = actual_cols_before_fu - template_cols_before_fu
             insert_at = 11  # Before what was 30D in template
-            for i in range(extra_cols):
-                ws.insert_cols(insert_at)
-                self.copy_column_format(ws, source_col=10, target_col=insert_at)
-                ws.cell(row=3, column=insert_at).value = "Result"
+            new_cols = range(insert_at, insert_at + extra_cols)
+            ws.insert_cols(insert_at, amount=extra_cols)
+            self.copy_column_format(ws, source_col=10, target_cols=new_cols)
+            for col in new_cols:
+                ws.cell(row=3, column=col).value = "Result"
         elif actual_cols_before_fu < template_cols_before_fu and delete_empty_cols:
             # Delete excess columns
             cols_to_delete = template_cols_before_fu - actual_cols_before_fu
-            for i in range(cols_to_delete):
-                col_to_del = 7 + actual_cols_before_fu
-                ws.delete_cols(col_to_del)
+            ws.delete_cols(7 + actual_cols_before_fu, amount=cols_to_delete)
             # Recalculate positions after deletion
             discharge_col = 7 + num_daily_days
             fu_start_col = discharge_col + 1
         
+        # Last column written per row (final follow-up visit)
+        last_data_col = fu_start_col + len(FOLLOWUP_VISITS) - 1
+        
+        # Fetch the header (row 1) and date (row 2) cells once; index is column - 1
+        header_cells, date_cells = ws.iter_rows(min_row=1, max_row=2, min_col=1, max_col=last_data_col)
+        
         # Set daily column headers (row 1) and dates (row 2)
         for idx, (date_str, day_offset, formatted_date) in enumerate(day_data):
             col = 7 + idx  # Start at column G
@@ -891,32 +1028,32 @@ class LabsExporter(BaseExporter):
             else:
                 header = f"Day {idx + 1}"
             
-            ws.cell(row=1, column=col).value = header
-            ws.cell(row=2, column=col).value = formatted_date
+            header_cells[col - 1].value = header
+            date_cells[col - 1].value = formatted_date
         
         # Set Discharge column header and date
-        ws.cell(row=1, column=discharge_col).value = "Discharge"
+        header_cells[discharge_col - 1].value = "Discharge"
         dv_config = LABS_VISIT_CONFIG.get("Discharge")
         if dv_config and "date_col" in dv_config:
             dv_date = row.get(dv_config["date_col"], "")
             if self.is_valid_value(dv_date):
-                ws.cell(row=2, column=discharge_col).value = self.format_date(dv_date)
+                date_cells[discharge_col - 1].value = self.format_date(dv_date)
         
         # Set follow-up column headers and dates
         fu_col = fu_start_col
         for visit_name in FOLLOWUP_VISITS:
-            ws.cell(row=1, column=fu_col).value = visit_name
+            header_cells[fu_col - 1].value = visit_name
             config = LABS_VISIT_CONFIG.get(visit_name)
             if config and "date_col" in config:
                 date_val = row.get(config["date_col"], "")
                 if self.is_valid_value(date_val):
-                    ws.cell(row=2, column=fu_col).value = self.format_date(date_val)
+                    date_cells[fu_col - 1].value = self.format_date(date_val)
             fu_col += 1
         
         # Fill in Screening date
         screening_date = row.get("SBV_SV_SVSTDTC", "")
         if self.is_valid_value(screening_date):
-            ws.cell(row=2, column=6).value = self.format_date(screening_date)
+            date_cells[5].value = self.format_date(screening_date)  # Column F
         
         # Collect reference values for chart parameters (to update Sheet1)
         chart_ref_values = {}
@@ -925,7 +1062,30 @@ class LabsExporter(BaseExporter):
         # Resolve units first
         self.param_target_units = self.resolve_units(row, num_daily_days, patient_id)
 
+        # (column, prefix, pipe index) of every visit after screening; the same for every parameter row
+        dv_prefix = LABS_VISIT_CONFIG.get("Discharge", {}).get("prefix", "DV_LB_")
+        visit_cols = [(7 + day_idx, "TV_LB_", day_idx) for day_idx in range(num_daily_days)]
+        visit_cols.append((discharge_col, dv_prefix, None))
+        visit_cols.extend((fu_start_col + i, LABS_VISIT_CONFIG[visit_name]["prefix"], None)
+                          for i, visit_name in enumerate(FOLLOWUP_VISITS)
+                          if LABS_VISIT_CONFIG.get(visit_name))
+        
+        # Bind per-value helpers locally for the parameter x visit loop
+        get_lab_value = self.get_lab_value
+        get_units = self.get_units
+        get_lab_status = self.get_lab_status
+        get_troponin_value = self.get_troponin_value
+        normalize_unit = self.normalize_unit
+        convert_value = self.convert_value
+        to_number = self.to_number
+        write_cell = self._write_cell
+        colorize = self._colorize
+
         for template_row, (param_name, test_code_raw, lab_type) in TEMPLATE_ROW_MAP.items():
+            # Fetch the row's cells once; row_cells[col - 1] is column `col`
+            row_cells = next(ws.iter_rows(min_row=template_row, max_row=template_row,
+                                          min_col=1, max_col=last_data_col))
+            
             # Handle list of test codes (e.g. Troponin)
             if isinstance(test_code_raw, list):
                 test_codes = test_code_raw
@@ -942,22 +1102,31 @@ class LabsExporter(BaseExporter):
             if not test_code:
                 test_code = test_codes[0]
             
+            # Troponin T/I values carry a type label: read and write them as text
+            is_troponin = template_row == 19
+            visit_value = self._troponin_visit_value if is_troponin else self._visit_value
+            
             # Get resolved target unit for this parameter (row)
             target_unit_info = self.param_target_units.get(template_row)
             
             # Check if this is a dual-unit case
             is_dual = isinstance(target_unit_info, dict) and target_unit_info.get('dual')
             dual_units = target_unit_info.get('units', []) if is_dual else []
+            # Per-unit font for dual-unit values (blue for the first unit, green for the second)
+            if is_dual and len(dual_units) >= 2:
+                dual_fonts = {dual_units[0]: _FONT_DUAL_A, dual_units[1]: _FONT_DUAL_B}
+            else:
+                dual_fonts = {}
 
             # --- Screening Unit ---
-            screening_unit_raw = self.get_units(row, "SBV_LB_", lab_type, test_code)
+            screening_unit_raw = get_units(row, "SBV_LB_", lab_type, test_code)
             # Fallback if missing
             if not screening_unit_raw:
-                screening_unit_raw = self.get_units(row, "TV_LB_", lab_type, test_code, pipe_index=0)
+                screening_unit_raw = get_units(row, "TV_LB_", lab_type, test_code, pipe_index=0)
             if not screening_unit_raw:
-                screening_unit_raw = self.get_units(row, "FU1M_LB_", lab_type, test_code)
+                screening_unit_raw = get_units(row, "FU1M_LB_", lab_type, test_code)
             
-            screening_unit = self.normalize_unit(screening_unit_raw)
+            screening_unit = normalize_unit(screening_unit_raw)
 
             # Determine Display Unit
             if is_dual:
@@ -968,35 +1137,29 @@ class LabsExporter(BaseExporter):
 
             # --- Reference Values ---
             ref_min, ref_max, ref_unit = self.get_reference_values(row, lab_type, test_code)
-            ref_unit_normalized = self.normalize_unit(ref_unit) if ref_unit else screening_unit
+            ref_unit_normalized = normalize_unit(ref_unit) if ref_unit else screening_unit
             
             # For dual units, don't convert ref values - just display as-is
             # Convert using the actual ref_unit (from source of ref values), not screening_unit
             if not is_dual and display_unit and ref_unit_normalized and display_unit != ref_unit_normalized:
-                ref_min = self.convert_value(ref_min, ref_unit_normalized, display_unit, test_code)
-                ref_max = self.convert_value(ref_max, ref_unit_normalized, display_unit, test_code)
+                ref_min = convert_value(ref_min, ref_unit_normalized, display_unit, test_code)
+                ref_max = convert_value(ref_max, ref_unit_normalized, display_unit, test_code)
             
             if ref_min is not None:
-                ws.cell(row=template_row, column=3).value = self.to_number(ref_min)
+                row_cells[2].value = to_number(ref_min)  # Column C
             if ref_max is not None:
-                ws.cell(row=template_row, column=4).value = self.to_number(ref_max)
+                row_cells[3].value = to_number(ref_max)  # Column D
             
             # --- Set Unit Column (E) ---
             if display_unit:
-                unit_cell = ws.cell(row=template_row, column=5)
+                unit_cell = row_cells[4]  # Column E
                 if is_dual and len(dual_units) >= 2:
-                    # Use rich text to color-code each unit in the combined string
-                    from openpyxl.cell.rich_text import TextBlock, CellRichText
-                    from openpyxl.cell.text import InlineFont
-                    
-                    # Create colored text blocks: "unit1" in blue, "/" in black, "unit2" in green
-                    blue_font = InlineFont(color=DUAL_UNIT_COLORS['unit1'])
-                    green_font = InlineFont(color=DUAL_UNIT_COLORS['unit2'])
-                    
+                    # Use rich text to color-code each unit in the combined string:
+                    # "unit1" in blue, "/" in black, "unit2" in green
                     rich_text = CellRichText(
-                        TextBlock(blue_font, dual_units[0]),
+                        TextBlock(_INLINE_FONT_DUAL_A, dual_units[0]),
                         "/",
-                        TextBlock(green_font, dual_units[1])
+                        TextBlock(_INLINE_FONT_DUAL_B, dual_units[1])
                     )
                     unit_cell.value = rich_text
                 else:
@@ -1008,183 +1171,58 @@ class LabsExporter(BaseExporter):
             if template_row in chart_param_map:
                 chart_ref_values[chart_param_map[template_row]] = (ref_min, ref_max, display_unit)
             
+            # Troponin values carry a T/I text label, so are never range-checked
+            # Bounds are parsed once per parameter rather than once per written cell
+            oor_range = None
+            if self.highlight_out_of_range and not is_troponin:
+                bounds = (self.to_float(ref_min), self.to_float(ref_max))
+                if bounds != (None, None):
+                    oor_range = bounds
+            
             # --- Screening Value (Column F) ---
-            # Special handling for Troponin (row 19) - include T/I label
-            if template_row == 19:  # Troponin T/I
-                screening_val = self.get_troponin_value(row, "SBV_LB_")
-                # Troponin is complex string, skip conversion usually
+            if is_troponin:
+                # Troponin is a labelled string (T/I), skip conversion
+                screening_val = get_troponin_value(row, "SBV_LB_")
             else:
-                raw_val = self.get_lab_value(row, "SBV_LB_", lab_type, test_code)
+                raw_val = get_lab_value(row, "SBV_LB_", lab_type, test_code)
                 # For dual display, don't convert - just display raw value
                 if is_dual:
                     screening_val = raw_val
                 else:
-                    screening_val = self.convert_value(raw_val, screening_unit, display_unit, test_code)
+                    screening_val = convert_value(raw_val, screening_unit, display_unit, test_code)
             
             if screening_val is not None:
-                cell = ws.cell(row=template_row, column=6)
-                # Don't convert Troponin to number since it has text label
-                if template_row == 19:
-                    cell.value = screening_val
-                else:
-                    cell.value = self.to_number(screening_val)
-                
-                # Apply out-of-range highlighting (red) - takes precedence
-                if self.highlight_out_of_range and template_row != 19 and self.is_outside_reference_range(screening_val, ref_min, ref_max):
-                    cell.font = Font(color=OUT_OF_RANGE_COLOR)
-                # Apply color coding for dual-unit mode
-                elif is_dual and len(dual_units) >= 2 and screening_unit:
-                    if screening_unit == dual_units[0]:
-                        cell.font = Font(color=DUAL_UNIT_COLORS['unit1'])  # Blue
-                    elif screening_unit == dual_units[1]:
-                        cell.font = Font(color=DUAL_UNIT_COLORS['unit2'])  # Green
+                cell = row_cells[5]  # Column F
+                write_cell(cell, screening_val, is_troponin)
+                colorize(cell, screening_val, screening_unit, oor_range, dual_fonts)
             else:
-                status = self.get_lab_status(row, "SBV_LB_", lab_type, test_code)
+                status = get_lab_status(row, "SBV_LB_", lab_type, test_code)
                 if status:
-                    ws.cell(row=template_row, column=6).value = status
+                    row_cells[5].value = status
             
-            # --- Daily Labs ---
-            for day_idx in range(num_daily_days):
-                col = 7 + day_idx
-                
-                # Special handling for Troponin (row 19)
-                if template_row == 19:
-                    val = self.get_troponin_value(row, "TV_LB_", pipe_index=day_idx)
-                    value_unit = None
-                else:
-                    raw_val = self.get_lab_value(row, "TV_LB_", lab_type, test_code, pipe_index=day_idx)
-                    daily_unit_raw = self.get_units(row, "TV_LB_", lab_type, test_code, pipe_index=day_idx)
-                    value_unit = self.normalize_unit(daily_unit_raw)
-                    
-                    # For dual display, don't convert - just display raw value
-                    if is_dual:
-                        val = raw_val
-                    else:
-                        d_unit = value_unit if value_unit else display_unit 
-                        val = self.convert_value(raw_val, d_unit, display_unit, test_code)
-                
+            # --- Daily Labs, Discharge and Follow-up Visits ---
+            for col, prefix, pipe_index in visit_cols:
+                val, value_unit = visit_value(row, prefix, lab_type, test_code, pipe_index,
+                                              display_unit, is_dual)
+                cell = row_cells[col - 1]
                 if val is not None:
-                    cell = ws.cell(row=template_row, column=col)
-                    # Don't convert Troponin to number since it has text label
-                    if template_row == 19:
-                        cell.value = val
-                    else:
-                        cell.value = self.to_number(val)
-                    
-                    # Apply out-of-range highlighting (red) - takes precedence
-                    if self.highlight_out_of_range and template_row != 19 and self.is_outside_reference_range(val, ref_min, ref_max):
-                        cell.font = Font(color=OUT_OF_RANGE_COLOR)
-                    # Apply color coding for dual-unit mode
-                    elif is_dual and len(dual_units) >= 2 and value_unit:
-                        if value_unit == dual_units[0]:
-                            cell.font = Font(color=DUAL_UNIT_COLORS['unit1'])  # Blue
-                        elif value_unit == dual_units[1]:
-                            cell.font = Font(color=DUAL_UNIT_COLORS['unit2'])  # Green
+                    write_cell(cell, val, is_troponin)
+                    colorize(cell, val, value_unit, oor_range, dual_fonts)
                 else:
-                    status = self.get_lab_status(row, "TV_LB_", lab_type, test_code, pipe_index=day_idx)
+                    status = get_lab_status(row, prefix, lab_type, test_code, pipe_index=pipe_index)
                     if status:
-                        ws.cell(row=template_row, column=col).value = status
-            
-            # --- Discharge Visit ---
-            dv_prefix = LABS_VISIT_CONFIG.get("Discharge", {}).get("prefix", "DV_LB_")
-            if template_row == 19:  # Troponin
-                dv_val = self.get_troponin_value(row, dv_prefix)
-                value_unit = None
-            else:
-                dv_raw = self.get_lab_value(row, dv_prefix, lab_type, test_code)
-                dv_unit_raw = self.get_units(row, dv_prefix, lab_type, test_code)
-                value_unit = self.normalize_unit(dv_unit_raw)
-                
-                if is_dual:
-                    dv_val = dv_raw
-                else:
-                    d_unit = value_unit if value_unit else display_unit
-                    dv_val = self.convert_value(dv_raw, d_unit, display_unit, test_code)
-            
-            if dv_val is not None:
-                cell = ws.cell(row=template_row, column=discharge_col)
-                if template_row == 19:
-                    cell.value = dv_val
-                else:
-                    cell.value = self.to_number(dv_val)
-                
-                # Apply out-of-range highlighting (red) - takes precedence
-                if self.highlight_out_of_range and template_row != 19 and self.is_outside_reference_range(dv_val, ref_min, ref_max):
-                    cell.font = Font(color=OUT_OF_RANGE_COLOR)
-                # Apply color coding for dual-unit mode
-                elif is_dual and len(dual_units) >= 2 and value_unit:
-                    if value_unit == dual_units[0]:
-                        cell.font = Font(color=DUAL_UNIT_COLORS['unit1'])
-                    elif value_unit == dual_units[1]:
-                        cell.font = Font(color=DUAL_UNIT_COLORS['unit2'])
-            else:
-                status = self.get_lab_status(row, dv_prefix, lab_type, test_code)
-                if status:
-                    ws.cell(row=template_row, column=discharge_col).value = status
-            
-            # --- Follow-up Visits ---
-            fu_col = fu_start_col
-            for visit_name in FOLLOWUP_VISITS:
-                config = LABS_VISIT_CONFIG.get(visit_name)
-                if not config:
-                    fu_col += 1
-                    continue
-                
-                prefix = config["prefix"]
-                
-                # Special handling for Troponin (row 19)
-                if template_row == 19:
-                    val = self.get_troponin_value(row, prefix)
-                    value_unit = None
-                else:
-                    raw_val = self.get_lab_value(row, prefix, lab_type, test_code)
-                    fu_unit_raw = self.get_units(row, prefix, lab_type, test_code)
-                    value_unit = self.normalize_unit(fu_unit_raw)
-                    
-                    # For dual display, don't convert - just display raw value
-                    if is_dual:
-                        val = raw_val
-                    else:
-                        f_unit = value_unit if value_unit else display_unit
-                        val = self.convert_value(raw_val, f_unit, display_unit, test_code)
-                
-                if val is not None:
-                    cell = ws.cell(row=template_row, column=fu_col)
-                    # Don't convert Troponin to number since it has text label
-                    if template_row == 19:
-                        cell.value = val
-                    else:
-                        cell.value = self.to_number(val)
-                    
-                    # Apply out-of-range highlighting (red) - takes precedence
-                    if self.highlight_out_of_range and template_row != 19 and self.is_outside_reference_range(val, ref_min, ref_max):
-                        cell.font = Font(color=OUT_OF_RANGE_COLOR)
-                    # Apply color coding for dual-unit mode
-                    elif is_dual and len(dual_units) >= 2 and value_unit:
-                        if value_unit == dual_units[0]:
-                            cell.font = Font(color=DUAL_UNIT_COLORS['unit1'])  # Blue
-                        elif value_unit == dual_units[1]:
-                            cell.font = Font(color=DUAL_UNIT_COLORS['unit2'])  # Green
-                else:
-                    status = self.get_lab_status(row, prefix, lab_type, test_code)
-                    if status:
-                        ws.cell(row=template_row, column=fu_col).value = status
-                
-                fu_col += 1
-        
-        # Update Sheet1 reference range columns to match daily column count
-        self.update_sheet1_columns(wb, num_daily_days, day_data, chart_ref_values)
-        
-        # Update chart labels (titles and series names)
-        self.update_chart_labels(ws, patient_id, chart_ref_values)
+                        cell.value = status
         
-        # Update charts with peri-procedural data only
-        self.update_charts(ws, num_daily_days, day_data)
+        # Sheet1 reference columns, chart labels and chart data ranges
+        self._finalize_sheet_and_charts(wb, ws, patient_id, num_daily_days, day_data, chart_ref_values)
         
+        if out is not None:
+            wb.save(out)
+            return True
         # Save to BytesIO
-        out = BytesIO()
-        wb.save(out)
-        return out.getvalue()
+        buf = BytesIO()
+        wb.save(buf)
+        return buf.getvalue()
     
     def generate_export(self, patient_ids, delete_empty_cols=True):
         """Generate export for one or multiple patients."""
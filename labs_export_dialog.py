@@ -4,18 +4,34 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import pandas as pd
 import os
+import sys
+import subprocess
 import logging
+import threading
+import queue
 
 from labs_export import LabsExporter
 
 logger = logging.getLogger(__name__)
 
 
+def _open_file(path):
+    """Open *path* in the platform's default viewer without waiting for it."""
+    if sys.platform == 'win32':
+        os.startfile(path)
+    elif sys.platform == 'darwin':
+        subprocess.Popen(['open', path], start_new_session=True)
+    else:
+        subprocess.Popen(['xdg-open', path], start_new_session=True,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
 class LabsExportDialog:
     """Labs data export configuration dialog."""
 
     def __init__(self, app):
         self.app = app
+        self._tpl_cache = {}  # (path, mtime) -> template file contents
 
     def show(self):
         """Show configuration dialog for Labs Export."""
@@ -62,28 +78,28 @@ class LabsExportDialog:
         tk.Button(btn_row, text="Select None", command=lambda: self._select_all_patients(False),
                   bg="#e74c3c", fg="white", font=("Segoe UI", 8, "bold"), padx=8).pack(side=tk.LEFT, padx=2)
 
-        # Patient list with scrollbar
+        # Patient list with scrollbar (a Listbox only draws its visible rows,
+        # so large cohorts stay responsive to filter toggles and scrolling)
         list_frame = tk.Frame(pat_filter_frame, bd=1, relief="sunken", bg="white")
         list_frame.pack(fill=tk.BOTH, expand=True)
 
-        canvas = tk.Canvas(list_frame, bg="white", highlightthickness=0)
-        sb = tk.Scrollbar(list_frame, orient="vertical", command=canvas.yview)
-        self._pat_scroll_frame = tk.Frame(canvas, bg="white")
+        self._pat_listbox = tk.Listbox(list_frame, selectmode=tk.EXTENDED, exportselection=False,
+                                       font=("Segoe UI", 9), bg="white", bd=0, highlightthickness=0)
+        sb = tk.Scrollbar(list_frame, orient="vertical", command=self._pat_listbox.yview)
+        self._pat_listbox.configure(yscrollcommand=sb.set)
 
-        self._pat_scroll_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        canvas.create_window((0, 0), window=self._pat_scroll_frame, anchor="nw")
-        canvas.configure(yscrollcommand=sb.set)
-
-        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self._pat_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
         sb.pack(side=tk.RIGHT, fill=tk.Y)
 
-        def _on_mousewheel(event):
-            canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
-        canvas.bind_all("<MouseWheel>", _on_mousewheel)
-
-        self._pat_chk_vars = {}
-        self._all_patients = sorted(self.app.df_main['Screening #'].dropna().unique())
-        self._update_patient_list()
+        # The list is filled once the dialog has been drawn (see _populate_patient_list)
+        self._all_patients = []
+        self._selected_pats = set()  # selection state, including hidden patients
+        self._visible_pats = []  # patients currently listed, in listbox order
+        self._sf_set = None  # screen-failure patients, worked out on first use
+        self._pat_loading_label = tk.Label(list_frame, text="Loading patients…", bg="white",
+                                           fg="#7f8c8d", font=("Segoe UI", 9, "italic"))
+        self._pat_loading_label.place(relx=0.5, rely=0.5, anchor="center")
+        win.after_idle(self._populate_patient_list)
 
         # 3. Output Options Section
         opt_frame = tk.LabelFrame(win, text=" Output Options ", padx=10, pady=8, bg="#f4f4f4", font=("Segoe UI", 10, "bold"))
@@ -108,11 +124,16 @@ class LabsExportDialog:
         btn_frame = tk.Frame(win, bg="#f4f4f4")
         btn_frame.pack(fill=tk.X, padx=10, pady=15)
 
-        tk.Button(btn_frame, text="Preview (Single Patient)", command=lambda: self._preview(win),
-                  bg="#3498db", fg="white", font=("Segoe UI", 10, "bold"), pady=10, cursor="hand2").pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(0, 5))
+        self._preview_btn = tk.Button(btn_frame, text="Preview (Single Patient)", command=lambda: self._preview(win),
+                                      bg="#3498db", fg="white", font=("Segoe UI", 10, "bold"), pady=10, cursor="hand2")
+        self._preview_btn.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(0, 5))
+
+        self._generate_btn = tk.Button(btn_frame, text="Generate Labs Reports", command=lambda: self._generate(win),
+                                       bg="#9b59b6", fg="white", font=("Segoe UI", 10, "bold"), pady=10, cursor="hand2")
+        self._generate_btn.pack(side=tk.RIGHT, expand=True, fill=tk.X, padx=(5, 0))
 
-        tk.Button(btn_frame, text="Generate Labs Reports", command=lambda: self._generate(win),
-                  bg="#9b59b6", fg="white", font=("Segoe UI", 10, "bold"), pady=10, cursor="hand2").pack(side=tk.RIGHT, expand=True, fill=tk.X, padx=(5, 0))
+        # Shown only while an export runs in the background
+        self._progress = ttk.Progressbar(win, mode="indeterminate")
 
         win.focus_set()
         win.grab_set()
@@ -122,33 +143,46 @@ class LabsExportDialog:
         if path:
             self._tpl_path_var.set(path)
 
+    def _populate_patient_list(self):
+        """Collect the cohort and fill the patient list, all selected."""
+        # Dedupe first, then drop missing IDs and sort the (much shorter) array natively
+        patients = self.app.df_main['Screening #'].unique()
+        patients = patients[~pd.isna(patients)]
+        # Blank IDs are dropped here once, not on every filter toggle
+        self._all_patients = [p for p in patients[patients.argsort()].tolist() if str(p).strip()]
+        self._selected_pats = set(self._all_patients)
+        self._pat_loading_label.destroy()
+        self._update_patient_list()
+
     def _update_patient_list(self):
-        for widget in self._pat_scroll_frame.winfo_children():
-            widget.destroy()
+        # Keep the selection of the patients being hidden/re-shown across filter changes
+        self._selected_pats.difference_update(self._visible_pats)
+        self._selected_pats.update(self._selected_patients())
 
-        exclude_sf = self._exclude_sf_var.get()
+        hidden = self._screen_failures() if self._exclude_sf_var.get() else frozenset()
+        self._visible_pats = [p for p in self._all_patients if p not in hidden]
 
-        for p in self._all_patients:
-            if not p:
-                continue
-            if exclude_sf and self.app._is_screen_failure(p):
-                continue
+        self._pat_listbox.delete(0, tk.END)
+        self._pat_listbox.insert(tk.END, *self._visible_pats)
+        for i, p in enumerate(self._visible_pats):
+            if p in self._selected_pats:
+                self._pat_listbox.selection_set(i)
 
-            if p in self._pat_chk_vars:
-                var = self._pat_chk_vars[p]
-            else:
-                var = tk.BooleanVar(value=True)
-                self._pat_chk_vars[p] = var
+    def _screen_failures(self):
+        """Screen-failure patients, checked once per dialog rather than on every filter toggle."""
+        if self._sf_set is None:
+            self._sf_set = frozenset(p for p in self._all_patients if self.app._is_screen_failure(p))
+        return self._sf_set
 
-            tk.Checkbutton(self._pat_scroll_frame, text=p, variable=var,
-                          bg="white", font=("Segoe UI", 9), anchor="w").pack(fill=tk.X, padx=5)
+    def _selected_patients(self):
+        """Selected patients among those listed, in list order."""
+        return [self._visible_pats[i] for i in self._pat_listbox.curselection()]
 
     def _select_all_patients(self, select):
-        for widget in self._pat_scroll_frame.winfo_children():
-            if isinstance(widget, tk.Checkbutton):
-                pat_id = widget.cget("text")
-                if pat_id in self._pat_chk_vars:
-                    self._pat_chk_vars[pat_id].set(select)
+        if select:
+            self._pat_listbox.selection_set(0, tk.END)
+        else:
+            self._pat_listbox.selection_clear(0, tk.END)
 
     def _ask_unit_resolution(self, param_name, found_units, patient_id):
         """Callback to resolve unit conflicts."""
@@ -189,24 +223,106 @@ class LabsExportDialog:
         top.wait_window()
         return result[0]
 
+    def _set_busy(self, dialog, busy):
+        state = tk.DISABLED if busy else tk.NORMAL
+        self._preview_btn.config(state=state)
+        self._generate_btn.config(state=state)
+        dialog.config(cursor="watch" if busy else "")
+        if busy:
+            self._progress.pack(fill=tk.X, padx=10, pady=(0, 10))
+            self._progress.start(50)
+        else:
+            self._progress.stop()
+            self._progress.pack_forget()
+
+    @staticmethod
+    def _template_mtime(tpl_path):
+        """Modification time of the template file, or None if it cannot be found."""
+        if not tpl_path:
+            return None
+        try:
+            return os.stat(tpl_path).st_mtime
+        except OSError:
+            return None
+
+    def _read_template(self, tpl_path, tpl_mtime):
+        """Template file contents, read again only when the file changes on disk."""
+        key = (tpl_path, tpl_mtime)
+        data = self._tpl_cache.get(key)
+        if data is None:
+            with open(tpl_path, "rb") as f:
+                data = f.read()
+            self._tpl_cache = {key: data}  # only the current template is worth keeping
+        return data
+
+    def _worker_unit_callback(self, dialog):
+        """unit_callback for exports running on a worker thread.
+
+        Each conflict prompt is a Tk window, so it is shown on the Tk thread
+        via after(); the worker waits for the answer on a queue. Only actual
+        conflicts cross threads; the unit scan itself stays on the worker.
+        """
+        def ask(param_name, found_units, patient_id):
+            answer = queue.Queue(maxsize=1)
+
+            def prompt():
+                unit = found_units[0] if found_units else None
+                try:
+                    if dialog.winfo_exists():
+                        unit = self._ask_unit_resolution(param_name, found_units, patient_id)
+                finally:
+                    answer.put(unit)  # Never leave the worker waiting
+
+            # Scheduled on the root: callbacks registered on the dialog are dropped if it closes
+            self.app.root.after(0, prompt)
+            return answer.get()
+
+        return ask
+
+    def _make_exporter(self, dialog, tpl_path, tpl_mtime, highlight_oor):
+        """Build the exporter for an export run by _run_in_background."""
+        return LabsExporter(self.app.df_main, tpl_path, self.app.labels,
+                            unit_callback=self._worker_unit_callback(dialog),
+                            highlight_out_of_range=highlight_oor,
+                            template_bytes=self._read_template(tpl_path, tpl_mtime))
+
+    def _run_in_background(self, dialog, work, on_done, error_prefix):
+        """Run work() on a worker thread and pass its result to on_done on the Tk thread."""
+        self._set_busy(dialog, True)
+
+        def finish(callback, arg):
+            self._set_busy(dialog, False)
+            callback(arg)
+
+        def show_error(msg):
+            messagebox.showerror("Error", f"{error_prefix}: {msg}")
+
+        def worker():
+            try:
+                callback, arg = on_done, work()
+            except Exception as e:
+                logger.exception("%s", error_prefix)
+                callback, arg = show_error, str(e)  # Capture before the exception is cleared
+            try:
+                dialog.after(0, finish, callback, arg)
+            except (tk.TclError, RuntimeError):
+                pass  # Dialog closed while exporting
+
+        threading.Thread(target=worker, daemon=True).start()
+
     def _preview(self, dialog):
         """Generate a temp file for a single selected patient and open in default viewer."""
         import tempfile
-        import subprocess
 
         tpl_path = self._tpl_path_var.get()
-        if not tpl_path or not os.path.exists(tpl_path):
+        tpl_mtime = self._template_mtime(tpl_path)
+        if tpl_mtime is None:
             messagebox.showerror("Error", "Please select a valid template file.")
             return
 
-        selected_pat = None
-        for p in self._all_patients:
-            if p in self._pat_chk_vars and self._pat_chk_vars[p].get():
-                exclude_sf = self._exclude_sf_var.get()
-                if exclude_sf and self.app._is_screen_failure(p):
-                    continue
-                selected_pat = p
-                break
+        # Screen failures are not listed while excluded, so the selection is already filtered
+        selected = self._selected_patients()
+        selected_pat = selected[0] if selected else None
 
         if not selected_pat:
             messagebox.showwarning("Warning", "Please select at least one patient for preview.")
@@ -216,54 +332,44 @@ class LabsExportDialog:
         highlight_oor = self._highlight_oor_var.get()
 
         try:
-            dialog.config(cursor="watch")
-            dialog.update()
+            exporter = self._make_exporter(dialog, tpl_path, tpl_mtime, highlight_oor)
+        except Exception as e:
+            messagebox.showerror("Error", f"Preview failed: {e}")
+            return
 
-            exporter = LabsExporter(self.app.df_main, tpl_path, self.app.labels,
-                                    unit_callback=self._ask_unit_resolution,
-                                    highlight_out_of_range=highlight_oor)
-            export_data = exporter.process_patient(selected_pat, delete_empty)
+        temp_path = os.path.join(tempfile.gettempdir(), f"{selected_pat}_labs_preview.xlsx")
 
-            if not export_data:
+        def work():
+            # Saved straight into the file, without an intermediate bytes copy
+            with open(temp_path, "wb") as f:
+                written = exporter.process_patient(selected_pat, delete_empty, out=f)
+            if not written:
+                os.remove(temp_path)
+                return None
+            return temp_path
+
+        def on_done(path):
+            if path is None:
                 messagebox.showinfo("Info", f"No data found for patient {selected_pat}.")
                 return
 
-            temp_dir = tempfile.gettempdir()
-            temp_path = os.path.join(temp_dir, f"{selected_pat}_labs_preview.xlsx")
-
-            with open(temp_path, "wb") as f:
-                f.write(export_data)
-
             try:
-                os.startfile(temp_path)
-            except AttributeError:
-                subprocess.run(["open", temp_path])
-            except Exception:
-                subprocess.run(["xdg-open", temp_path])
+                _open_file(path)
+            except OSError as e:
+                logger.warning("Could not open preview %s: %s", path, e)
 
-            messagebox.showinfo("Preview", f"Preview opened for patient: {selected_pat}\n\nFile: {temp_path}")
+            messagebox.showinfo("Preview", f"Preview opened for patient: {selected_pat}\n\nFile: {path}")
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Preview failed: {e}")
-        finally:
-            try:
-                dialog.config(cursor="")
-            except Exception:
-                pass
+        self._run_in_background(dialog, work, on_done, "Preview failed")
 
     def _generate(self, dialog):
         tpl_path = self._tpl_path_var.get()
-        if not tpl_path or not os.path.exists(tpl_path):
+        tpl_mtime = self._template_mtime(tpl_path)
+        if tpl_mtime is None:
             messagebox.showerror("Error", "Please select a valid template file.")
             return
 
-        selected_pats = []
-        for p in self._all_patients:
-            if p in self._pat_chk_vars and self._pat_chk_vars[p].get():
-                exclude_sf = self._exclude_sf_var.get()
-                if exclude_sf and self.app._is_screen_failure(p):
-                    continue
-                selected_pats.append(p)
+        selected_pats = self._selected_patients()
 
         delete_empty = self._delete_empty_cols_var.get()
         highlight_oor = self._highlight_oor_var.get()
@@ -273,14 +379,13 @@ class LabsExportDialog:
             return
 
         try:
-            dialog.config(cursor="watch")
-            dialog.update()
-
-            exporter = LabsExporter(self.app.df_main, tpl_path, self.app.labels,
-                                    unit_callback=self._ask_unit_resolution,
-                                    highlight_out_of_range=highlight_oor)
-            export_data, extension, patient_id = exporter.generate_export(selected_pats, delete_empty)
+            exporter = self._make_exporter(dialog, tpl_path, tpl_mtime, highlight_oor)
+        except Exception as e:
+            messagebox.showerror("Error", f"Export failed: {e}")
+            return
 
+        def on_done(result):
+            export_data, extension, patient_id = result
             if not export_data:
                 messagebox.showinfo("Info", "No data found for selected criteria.")
                 return
@@ -302,15 +407,14 @@ class LabsExportDialog:
             )
 
             if save_path:
-                with open(save_path, "wb") as f:
-                    f.write(export_data)
+                try:
+                    with open(save_path, "wb") as f:
+                        f.write(export_data)
+                except OSError as e:
+                    messagebox.showerror("Error", f"Export failed: {e}")
+                    return
                 messagebox.showinfo("Success", f"Labs reports saved to:\n{save_path}\n\n{len(selected_pats)} patient(s) exported.")
                 dialog.destroy()
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Export failed: {e}")
-        finally:
-            try:
-                dialog.config(cursor="")
-            except Exception:
-                pass
+        self._run_in_background(dialog, lambda: exporter.generate_export(selected_pats, delete_empty),
+                                on_done, "Export failed")
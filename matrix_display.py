@@ -7,13 +7,287 @@ display windows for clinical data forms (AE, CM, MH, HFH, HMEH, CVC, CVH, ACT).
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
+import numpy as np
 import pandas as pd
 import re
 import logging
+from functools import lru_cache
+from operator import itemgetter
 from datetime import datetime
 
+from openpyxl import Workbook
+
 logger = logging.getLogger(__name__)
 
+# Shared toolbar styling for the matrix windows
+_TOOLBAR_BG = "#f4f4f4"
+_BTN_GREEN = "#27ae60"     # Export XLSX
+_BTN_BLUE = "#3498db"      # Export CSV
+_MUTED_FG = "#666"         # Row count labels
+_FONT = ("Segoe UI", 9)
+_FONT_BOLD = ("Segoe UI", 9, "bold")
+_FONT_TITLE = ("Segoe UI", 11, "bold")
+
+# ACT row tags: missing result / confirmed not done / normal
+_ACT_TAG_STYLES = {
+    'gap': {'foreground': 'red', 'font': _FONT_BOLD},
+    'not_done': {'foreground': 'blue', 'font': ("Segoe UI", 9, "italic")},
+    'ok': {'foreground': 'black'},
+}
+_ACT_STATUS_TAG = {'GAP': 'gap', 'Confirmed': 'not_done'}  # any other status -> 'ok'
+
+_TIME_UNKNOWN_RE = re.compile(r',?\s*time\s*unknown', re.IGNORECASE)
+
+# Standard CM frequencies -> (multiplier, display_note, override_daily_dose)
+_FREQ_TABLE = {
+    "once a day": (1, "", None), "qd": (1, "", None), "od": (1, "", None),
+    "twice a day": (2, "", None), "bid": (2, "", None),
+    "3 times a day": (3, "", None), "tid": (3, "", None),
+    "4 times a day": (4, "", None), "qid": (4, "", None),
+    "every other day": (0.5, "(every 48h)", None), "qod": (0.5, "(every 48h)", None),
+    "as needed": (None, "PRN", None),
+    "once": (1, "(single dose)", None),
+}
+
+# Frequency (Other) free text: per-dose "<n> mg" amounts and "q<n>h" intervals
+_MG_RE = re.compile(r'(\d+(?:\.\d+)?)\s*mg')
+_QH_RE = re.compile(r'q\s*(\d+)\s*h')
+
+# Lowercased cell values treated as Yes / No / ticked-ongoing / blank
+_YES_VALUES = frozenset(('yes', 'y', '1', 'true'))
+_NO_VALUES = frozenset(('no', 'n', '0', 'false'))
+_ONGOING_VALUES = _YES_VALUES | {'checked'}
+_BLANK_VALUES = frozenset(('nan', 'none', ''))
+
+# Above this many rows an XLSX export offers to switch to CSV
+_LARGE_XLSX_ROWS = 10_000
+
+
+def _clean_text(col):
+    """Column as display text: missing/'nan' cells become '', the rest stripped."""
+    text = col.astype(str)
+    blank = col.isna() | (text.str.lower() == 'nan')
+    return text.str.strip().where(~blank, '')
+
+
+def _clean_date_text(text):
+    """Drop the time part of cleaned date text ('T...' or a trailing 'hh:mm') and 'time unknown'."""
+    has_t = text.str.contains('T', regex=False)
+    head, last = text.str.rsplit(' ', n=1).str[0], text.str.rsplit(' ', n=1).str[-1]
+    trailing_time = (~has_t & text.str.contains(' ', regex=False)
+                     & last.str.contains(r'\d') & last.str.contains(':', regex=False))
+    text = text.where(~has_t, text.str.split('T').str[0]).where(~trailing_time, head)
+    return text.str.replace(_TIME_UNKNOWN_RE, '', regex=True).str.strip()
+
+
+def _write_xlsx(df, path):
+    """Write *df* to a one-sheet workbook, streaming rows through a write-only workbook."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Sheet1')
+    ws.append([str(name) for name in df.columns])
+    for row in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+        ws.append(row)
+    wb.save(path)
+
+
+def _row_getter(columns):
+    """Return a callable giving the tuple of *columns* values from a record dict.
+
+    Every record must carry all of *columns* as keys.
+    """
+    if len(columns) == 1:
+        key = columns[0]
+        return lambda record: (record[key],)
+    if not columns:
+        return lambda record: ()
+    return itemgetter(*columns)
+
+
+def _insert_rows(tree, rows, tags=None):
+    """Append rows of values to a Treeview, with one tuple of *tags* per row if given.
+
+    Calls the Tcl insert command directly, skipping ttk's per-call option
+    formatting; tuples are passed to Tcl as lists unchanged.
+    """
+    call, path = tree.tk.call, str(tree)
+    if tags is None:
+        for values in rows:
+            call(path, 'insert', '', 'end', '-values', values)
+    else:
+        for values, row_tags in zip(rows, tags):
+            call(path, 'insert', '', 'end', '-values', values, '-tags', row_tags)
+
+
+# CM sheet column -> CM matrix heading
+_CM_HEADER_MAP = {
+    'LOGS_CM_CMTRT': 'Medication',
+    'LOGS_CM_CMINDC': 'Indication',
+    'LOGS_CM_CMREF_MH': 'MH Reference',
+    'LOGS_CM_CMREF_AE': 'AE Reference',
+    'LOGS_CM_CMINDC_OTH': 'Indication (Other)',
+    'LOGS_CM_CMSTDAT': 'Start Date',
+    'LOGS_CM_CMSTDTC': 'Start Date',
+    'LOGS_CM_CMENDAT': 'End Date',
+    'LOGS_CM_CMENDTC': 'End Date',
+    'LOGS_CM_CMDOSE': 'Dose',
+    'LOGS_CM_CMDOSU': 'Unit',
+    'LOGS_CM_CMROUTE': 'Route',
+    'LOGS_CM_CMDOSFRQ': 'Frequency',
+    'LOGS_CM_CMDOSFRQ_OTH': 'Frequency (Other)',
+    'Screening #': 'Subject',
+    'Randomization #': 'Rand #',
+    'Initials': 'Initials',
+    'Site #': 'Site',
+    'Status': 'Status'
+}
+
+_CM_EXCLUDE_COLS = ('Row number', 'Form name', 'Form SN')
+
+
+@lru_cache(maxsize=8)
+def _resolve_cm_columns(columns):
+    """Resolve the CM matrix layout for a CM sheet's column names. Cached per schema.
+
+    Returns (ongoing_col, dose_col, freq_col, freq_oth_col, unit_col,
+    column_specs, final_columns); column_specs holds one
+    (col, final_key, is_date, is_end_date) tuple per displayed source column
+    and final_columns ends with the calculated 'Daily Dose'.
+    """
+    # Column names are upper-cased once for all the lookups below
+    upper_cols = [(c, c.upper()) for c in columns]
+
+    def find_col(matches):
+        return next((c for c, upper in upper_cols if matches(upper)), None)
+
+    # Identify special columns
+    ongoing_col = find_col(lambda u: 'CMONGO' in u or 'ONGOING' in u)
+    end_date_col = find_col(lambda u: 'CMENDTC' in u or 'CMENDAT' in u or 'END DATE' in u)
+
+    display_columns = [col for col in columns
+                       if col not in _CM_EXCLUDE_COLS
+                       and not col.startswith('_')
+                       and (col != ongoing_col if ongoing_col else True)]
+
+    logger.debug("Using %d columns from CM sheet", len(display_columns))
+
+    # Determine final unique column names for Treeview
+    final_columns = []
+    seen_cols = set()
+    next_suffix = {}  # base name -> next " (n)" suffix to try
+    for col in display_columns:
+        base_name = _CM_HEADER_MAP.get(col, col)
+        final_name = base_name
+        if final_name in seen_cols:
+            counter = next_suffix.get(base_name, 2)
+            final_name = f"{base_name} ({counter})"
+            # Only loops past a header that is literally named "<base> (n)"
+            while final_name in seen_cols:
+                counter += 1
+                final_name = f"{base_name} ({counter})"
+            next_suffix[base_name] = counter + 1
+        seen_cols.add(final_name)
+        final_columns.append(final_name)
+
+    # Per-column flags, decided once rather than for every cell
+    column_specs = tuple(
+        (col, final_key,
+         any(tag in col.lower() for tag in ('date', 'dtc', 'dat')),
+         end_date_col is not None and col == end_date_col)
+        for col, final_key in zip(display_columns, final_columns)
+    )
+
+    # Add Daily Dose column (calculated field)
+    final_columns.append("Daily Dose")
+
+    # Identify columns needed for Daily Dose calculation
+    dose_col = find_col(lambda u: 'CMDOSE' in u and 'DOSU' not in u)
+    freq_col = find_col(lambda u: 'CMDOSFRQ' in u and 'OTH' not in u)
+    freq_oth_col = find_col(lambda u: 'CMDOSFRQ_OTH' in u or 'CMDOSFRQ_OTHER' in u)
+    unit_col = find_col(lambda u: 'CMDOSU' in u or 'UNIT' in u)
+
+    return (ongoing_col, dose_col, freq_col, freq_oth_col, unit_col,
+            column_specs, tuple(final_columns))
+
+
+@lru_cache(maxsize=1024)
+def _parse_other_frequency(freq_other_str):
+    """parse_frequency_multiplier for frequency 'Other', from its free text. Cached per text."""
+    other = freq_other_str.strip().lower()
+    if other in ('', 'nan', 'none'):
+        return 1, "", None
+
+    # Substring checks first: each regex only runs when it can match
+    mg_matches = _MG_RE.findall(other) if 'mg' in other else ()
+    if len(mg_matches) > 1:
+        total_dose = sum(map(float, mg_matches))
+        return None, f"({freq_other_str})", total_dose
+
+    if "every other day" in other or "qod" in other:
+        return 0.5, "(every 48h)", None
+
+    match = _QH_RE.match(other) if other.startswith('q') else None
+    if match:
+        interval_hours = int(match.group(1))
+        if interval_hours > 0:
+            # Whole doses within a day; longer intervals are a fraction of a dose per day
+            if interval_hours <= 24:
+                doses_per_day = 24 // interval_hours
+            else:
+                doses_per_day = round(24 / interval_hours, 2)
+            return doses_per_day, f"(q{interval_hours}h->{doses_per_day}x/d)", None
+
+    if "continuous" in other:
+        return None, "(continuous)", None
+
+    return 1, f"({freq_other_str.strip()})", None
+
+
+# Tcl lambda for _setup_columns: specs is a flat {col width anchor minwidth ...} list
+_SETUP_COLUMNS_TCL = """{tree specs} {
+    foreach {col width anchor minwidth} $specs {
+        $tree heading $col -text $col
+        $tree column $col -width $width -anchor $anchor -minwidth $minwidth
+    }
+}"""
+
+
+def _setup_columns(tree, specs):
+    """Set heading text and column layout for (col, width, anchor, minwidth) specs.
+
+    All columns are configured in a single Tcl call; the specs travel as a
+    Tcl list, so column names need no escaping.
+    """
+    flat = tuple(value for spec in specs for value in spec)
+    tree.tk.call('apply', _SETUP_COLUMNS_TCL, str(tree), flat)
+
+
+# Rows inserted per batch by _show_rows_lazily
+_LAZY_BATCH_ROWS = 500
+
+
+def _show_rows_lazily(tree, v_scroll, rows, tags=None):
+    """Insert the first batch of *rows* now and the next batch whenever the view nears the bottom.
+
+    Installs itself as the tree's yscrollcommand (forwarding to *v_scroll*);
+    calling it again with new rows, e.g. after a filter change, starts over.
+    *tags*, if given, is a list with one tag tuple per row.
+    """
+    loaded = 0
+
+    def load_batch():
+        nonlocal loaded
+        end = loaded + _LAZY_BATCH_ROWS
+        _insert_rows(tree, rows[loaded:end], None if tags is None else tags[loaded:end])
+        loaded = min(end, len(rows))
+
+    def on_yscroll(first, last):
+        v_scroll.set(first, last)
+        if loaded < len(rows) and float(last) > 0.9:
+            load_batch()
+
+    load_batch()
+    tree.configure(yscrollcommand=on_yscroll)
+
 
 class MatrixDisplay:
     """Manages specialized matrix/table display windows.
@@ -25,6 +299,26 @@ class MatrixDisplay:
     def __init__(self, app):
         self.app = app
 
+    def _setup_toplevel(self, title, geometry):
+        """Create a matrix window over the main window, shown once it has been built.
+
+        The window stays withdrawn while the caller packs its widgets and is
+        mapped, raised and focused in a single step when Tk next goes idle.
+        """
+        win = tk.Toplevel(self.app.root)
+        win.withdraw()
+        win.title(title)
+        win.geometry(geometry)
+        win.transient(self.app.root)
+
+        def show():
+            win.deiconify()
+            win.lift()
+            win.focus_force()
+
+        win.after_idle(show)
+        return win
+
     # ------------------------------------------------------------------
     # Generic export helper — replaces 6 near-identical export methods
     # ------------------------------------------------------------------
@@ -35,6 +329,12 @@ class MatrixDisplay:
             messagebox.showerror("Error", f"No {prefix} data to export.")
             return
 
+        if fmt == 'xlsx' and len(df) > _LARGE_XLSX_ROWS:
+            if messagebox.askyesno("Large Export",
+                                   f"Exporting {len(df):,} rows to XLSX will be slow.\n\n"
+                                   "Export as CSV instead?"):
+                fmt = 'csv'
+
         ext = 'xlsx' if fmt == 'xlsx' else 'csv'
         path = filedialog.asksaveasfilename(
             defaultextension=f".{ext}",
@@ -46,7 +346,7 @@ class MatrixDisplay:
 
         try:
             if fmt == 'xlsx':
-                df.to_excel(path, index=False)
+                _write_xlsx(df, path)
             else:
                 df.to_csv(path, index=False)
             messagebox.showinfo("Success", f"{prefix} data exported to:\n{path}")
@@ -77,26 +377,21 @@ class MatrixDisplay:
             messagebox.showinfo("Info", f"No valid {title} data found.")
             return None, None, None
 
-        win = tk.Toplevel(self.app.root)
-        win.title(f"{title} - Patient {pat}")
-        win.geometry(geometry)
-        win.transient(self.app.root)
-        win.lift()
-        win.focus_force()
+        win = self._setup_toplevel(f"{title} - Patient {pat}", geometry)
 
         df = pd.DataFrame(data)
 
         # Toolbar
-        toolbar = tk.Frame(win, bg="#f4f4f4", pady=5)
+        toolbar = tk.Frame(win, bg=_TOOLBAR_BG, pady=5)
         toolbar.pack(fill=tk.X, side=tk.TOP)
 
-        tk.Label(toolbar, text="Export:", bg="#f4f4f4", font=("Segoe UI", 9)).pack(side=tk.LEFT, padx=(10, 5))
+        tk.Label(toolbar, text="Export:", bg=_TOOLBAR_BG, font=_FONT).pack(side=tk.LEFT, padx=(10, 5))
         tk.Button(toolbar, text="Export XLSX",
                   command=lambda: self._export_matrix('xlsx', df, pat, prefix),
-                  bg="#27ae60", fg="white", font=("Segoe UI", 9, "bold")).pack(side=tk.LEFT, padx=5)
+                  bg=_BTN_GREEN, fg="white", font=_FONT_BOLD).pack(side=tk.LEFT, padx=5)
         tk.Button(toolbar, text="Export CSV",
                   command=lambda: self._export_matrix('csv', df, pat, prefix),
-                  bg="#3498db", fg="white", font=("Segoe UI", 9, "bold")).pack(side=tk.LEFT, padx=5)
+                  bg=_BTN_BLUE, fg="white", font=_FONT_BOLD).pack(side=tk.LEFT, padx=5)
 
         # Determine display columns: preferred order first, then any extras
         display_columns = [c for c in column_order if any(c in r for r in data)]
@@ -105,11 +400,13 @@ class MatrixDisplay:
                 if k not in display_columns and k not in exclude_keys:
                     display_columns.append(k)
 
-        # Filter out entirely empty columns
-        display_columns = [
-            c for c in display_columns
-            if any(str(record.get(c, '')).strip() for record in data)
-        ]
+        # Filter out entirely empty columns, collecting the keys with data in one pass
+        filled_keys = set()
+        for record in data:
+            for k, v in record.items():
+                if k not in filled_keys and str(v).strip():
+                    filled_keys.add(k)
+        display_columns = [c for c in display_columns if c in filled_keys]
 
         # Tree view
         tree_frame = tk.Frame(win)
@@ -117,14 +414,9 @@ class MatrixDisplay:
 
         tree = ttk.Treeview(tree_frame, columns=display_columns, show='headings')
 
-        for col in display_columns:
-            tree.heading(col, text=col)
-            width = col_widths.get(col, 120)
-            tree.column(col, width=width, anchor="w", minwidth=50)
+        _setup_columns(tree, [(col, col_widths.get(col, 120), "w", 50) for col in display_columns])
 
-        for record in data:
-            values = [record.get(col, '') for col in display_columns]
-            tree.insert("", "end", values=values)
+        _insert_rows(tree, (tuple(record.get(col, '') for col in display_columns) for record in data))
 
         # Scrollbars
         h_scroll = ttk.Scrollbar(tree_frame, orient="horizontal", command=tree.xview)
@@ -173,82 +465,57 @@ class MatrixDisplay:
                     available_cols[display_name] = pn
                     break
 
-        # Build the data for display
-        ae_data = []
-        for _, ae_row in pat_aes.iterrows():
-            row_data = {}
-            ongoing_value = False
-
-            for display_name, source_col in available_cols.items():
-                val = ae_row.get(source_col, '')
-                if pd.isna(val) or str(val).lower() == 'nan':
-                    val = ''
-                else:
-                    val = str(val).strip()
-
-                    # Clean up date values
-                    if 'Date' in display_name:
-                        if 'T' in val:
-                            val = val.split('T')[0]
-                        elif ' ' in val and any(c.isdigit() for c in val.split(' ')[-1]):
-                            parts = val.split(' ')
-                            if len(parts) > 1 and ':' in parts[-1]:
-                                val = ' '.join(parts[:-1])
-                        val = re.sub(r',?\s*time\s*unknown', '', val, flags=re.IGNORECASE).strip()
-
-                    # Clean up SAE values
-                    if display_name == 'SAE?':
-                        if val.lower() in ['yes', 'y', '1', 'true']:
-                            val = 'Yes'
-                        elif val.lower() in ['no', 'n', '0', 'false']:
-                            val = 'No'
-
-                    # Check Ongoing flag
-                    if display_name == 'Ongoing':
-                        ongoing_value = val.lower() in ['yes', 'y', '1', 'true', 'checked']
-
-                row_data[display_name] = val
-
-            # Apply Ongoing flag to Resolution Date
-            if ongoing_value and 'Resolution Date' in row_data:
-                row_data['Resolution Date'] = 'Ongoing'
-
-            if row_data.get('AE Term', '').strip():
-                ae_data.append(row_data)
+        # Build the data for display, one column at a time
+        sub = pd.DataFrame({display_name: _clean_text(pat_aes[source_col])
+                            for display_name, source_col in available_cols.items()},
+                           index=pat_aes.index)
+        for display_name in sub.columns:
+            if 'Date' in display_name:
+                sub[display_name] = _clean_date_text(sub[display_name])
+
+        if 'SAE?' in sub:
+            sae_lower = sub['SAE?'].str.lower()
+            sub['SAE?'] = (sub['SAE?'].mask(sae_lower.isin(_YES_VALUES), 'Yes')
+                           .mask(sae_lower.isin(_NO_VALUES), 'No'))
+
+        # Ongoing events show 'Ongoing' as their resolution date
+        if 'Ongoing' in sub and 'Resolution Date' in sub:
+            ongoing = sub['Ongoing'].str.lower().isin(_ONGOING_VALUES)
+            sub.loc[ongoing, 'Resolution Date'] = 'Ongoing'
+
+        if 'AE Term' in sub:
+            ae_data = sub[sub['AE Term'] != ''].to_dict('records')
+        else:
+            ae_data = []
 
         if not ae_data:
             messagebox.showinfo("Info", "No valid adverse event terms found.")
             return
 
         # Create window
-        win = tk.Toplevel(self.app.root)
-        win.title(f"Adverse Events - Patient {pat}")
-        win.geometry("1400x600")
-        win.transient(self.app.root)
-        win.lift()
-        win.focus_force()
+        win = self._setup_toplevel(f"Adverse Events - Patient {pat}", "1400x600")
 
         # Store for export
-        self._ae_matrix_df = pd.DataFrame(ae_data)
+        self._ae_matrix_rows = ae_data
         self._ae_matrix_patient = pat
 
         # Toolbar
-        toolbar = tk.Frame(win, bg="#f4f4f4", pady=5)
+        toolbar = tk.Frame(win, bg=_TOOLBAR_BG, pady=5)
         toolbar.pack(fill=tk.X, side=tk.TOP)
 
-        tk.Label(toolbar, text="Export:", bg="#f4f4f4", font=("Segoe UI", 9)).pack(side=tk.LEFT, padx=(10, 5))
+        tk.Label(toolbar, text="Export:", bg=_TOOLBAR_BG, font=_FONT).pack(side=tk.LEFT, padx=(10, 5))
         tk.Button(toolbar, text="Export XLSX",
-                  command=lambda: self._export_matrix('xlsx', self._ae_matrix_df, self._ae_matrix_patient, "AE_Matrix"),
-                  bg="#27ae60", fg="white", font=("Segoe UI", 9, "bold")).pack(side=tk.LEFT, padx=5)
+                  command=lambda: self._export_matrix('xlsx', pd.DataFrame(self._ae_matrix_rows), self._ae_matrix_patient, "AE_Matrix"),
+                  bg=_BTN_GREEN, fg="white", font=_FONT_BOLD).pack(side=tk.LEFT, padx=5)
         tk.Button(toolbar, text="Export CSV",
-                  command=lambda: self._export_matrix('csv', self._ae_matrix_df, self._ae_matrix_patient, "AE_Matrix"),
-                  bg="#3498db", fg="white", font=("Segoe UI", 9, "bold")).pack(side=tk.LEFT, padx=5)
+                  command=lambda: self._export_matrix('csv', pd.DataFrame(self._ae_matrix_rows), self._ae_matrix_patient, "AE_Matrix"),
+                  bg=_BTN_BLUE, fg="white", font=_FONT_BOLD).pack(side=tk.LEFT, padx=5)
 
-        tk.Label(toolbar, text=f"  |  {len(ae_data)} adverse event(s) found", bg="#f4f4f4", fg="#666",
-                 font=("Segoe UI", 9)).pack(side=tk.LEFT, padx=10)
+        tk.Label(toolbar, text=f"  |  {len(ae_data)} adverse event(s) found", bg=_TOOLBAR_BG, fg=_MUTED_FG,
+                 font=_FONT).pack(side=tk.LEFT, padx=10)
 
         # Interval filter checkboxes
-        tk.Label(toolbar, text="  |  Exclude:", bg="#f4f4f4", font=("Segoe UI", 9)).pack(side=tk.LEFT, padx=(10, 5))
+        tk.Label(toolbar, text="  |  Exclude:", bg=_TOOLBAR_BG, font=_FONT).pack(side=tk.LEFT, padx=(10, 5))
         exclude_screening_var = tk.BooleanVar(value=False)
         exclude_prior_var = tk.BooleanVar(value=False)
 
@@ -270,48 +537,48 @@ class MatrixDisplay:
             'AE Description': 200, 'SAE Description': 200
         }
 
-        for col in display_columns:
-            tree.heading(col, text=col)
-            width = col_widths.get(col, 100)
-            tree.column(col, width=width,
-                        anchor="w" if col in ['AE Term', 'AE Description', 'SAE Description'] else "center",
-                        minwidth=50)
+        _setup_columns(tree, [(col, col_widths.get(col, 100),
+                               "w" if col in ['AE Term', 'AE Description', 'SAE Description'] else "center",
+                               50)
+                              for col in display_columns])
+
+        # (lowercased interval, row values) per AE, so filter toggles only walk tuples;
+        # every AE record carries all available columns
+        row_values = _row_getter(display_columns)
+        rows_tuples = [(ae_record.get('Interval', '').lower(), row_values(ae_record))
+                       for ae_record in ae_data]
 
         def refresh_tree():
             """Rebuild tree with filtered data based on interval exclusions."""
-            for item in tree.get_children():
-                tree.delete(item)
+            children = tree.get_children()
+            if children:
+                tree.delete(*children)
 
-            filtered_data = []
-            for ae_record in ae_data:
-                interval_val = ae_record.get('Interval', '').lower()
-                if exclude_screening_var.get() and 'screening' in interval_val:
-                    continue
-                if exclude_prior_var.get() and 'prior to implant' in interval_val:
-                    continue
-                filtered_data.append(ae_record)
+            exclude_screening = exclude_screening_var.get()
+            exclude_prior = exclude_prior_var.get()
+            filtered_rows = [values for interval_val, values in rows_tuples
+                             if not (exclude_screening and 'screening' in interval_val)
+                             and not (exclude_prior and 'prior to implant' in interval_val)]
 
-            for ae_record in filtered_data:
-                values = [ae_record.get(col, '') for col in display_columns]
-                tree.insert("", "end", values=values)
+            _show_rows_lazily(tree, v_scroll, filtered_rows)
 
-            count_label.config(text=f"  |  {len(filtered_data)} adverse event(s) shown")
+            count_label.config(text=f"  |  {len(filtered_rows)} adverse event(s) shown")
 
         tk.Checkbutton(toolbar, text="During Screening", variable=exclude_screening_var,
-                       command=refresh_tree, bg="#f4f4f4", font=("Segoe UI", 9)).pack(side=tk.LEFT, padx=2)
+                       command=refresh_tree, bg=_TOOLBAR_BG, font=_FONT).pack(side=tk.LEFT, padx=2)
         tk.Checkbutton(toolbar, text="Prior to Implant", variable=exclude_prior_var,
-                       command=refresh_tree, bg="#f4f4f4", font=("Segoe UI", 9)).pack(side=tk.LEFT, padx=2)
+                       command=refresh_tree, bg=_TOOLBAR_BG, font=_FONT).pack(side=tk.LEFT, padx=2)
 
         count_label = tk.Label(toolbar, text=f"  |  {len(ae_data)} adverse event(s) shown",
-                               bg="#f4f4f4", fg="#666", font=("Segoe UI", 9))
+                               bg=_TOOLBAR_BG, fg=_MUTED_FG, font=_FONT)
         count_label.pack(side=tk.LEFT, padx=5)
 
-        refresh_tree()
-
-        # Scrollbars
+        # Scrollbars (refresh_tree hooks the vertical one up)
         h_scroll = ttk.Scrollbar(tree_frame, orient="horizontal", command=tree.xview)
         v_scroll = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
-        tree.configure(xscrollcommand=h_scroll.set, yscrollcommand=v_scroll.set)
+        tree.configure(xscrollcommand=h_scroll.set)
+
+        refresh_tree()
 
         tree.grid(row=0, column=0, sticky="nsew")
         v_scroll.grid(row=0, column=1, sticky="ns")
@@ -326,174 +593,65 @@ class MatrixDisplay:
 
     def show_cm_matrix(self, pat_cms, pat):
         """Display CM data from dedicated CM sheet as a structured table."""
-        header_map = {
-            'LOGS_CM_CMTRT': 'Medication',
-            'LOGS_CM_CMINDC': 'Indication',
-            'LOGS_CM_CMREF_MH': 'MH Reference',
-            'LOGS_CM_CMREF_AE': 'AE Reference',
-            'LOGS_CM_CMINDC_OTH': 'Indication (Other)',
-            'LOGS_CM_CMSTDAT': 'Start Date',
-            'LOGS_CM_CMSTDTC': 'Start Date',
-            'LOGS_CM_CMENDAT': 'End Date',
-            'LOGS_CM_CMENDTC': 'End Date',
-            'LOGS_CM_CMDOSE': 'Dose',
-            'LOGS_CM_CMDOSU': 'Unit',
-            'LOGS_CM_CMROUTE': 'Route',
-            'LOGS_CM_CMDOSFRQ': 'Frequency',
-            'LOGS_CM_CMDOSFRQ_OTH': 'Frequency (Other)',
-            'Screening #': 'Subject',
-            'Randomization #': 'Rand #',
-            'Initials': 'Initials',
-            'Site #': 'Site',
-            'Status': 'Status'
-        }
-
-        exclude_cols = ['Row number', 'Form name', 'Form SN']
-
-        # Identify special columns
-        ongoing_col = next((c for c in pat_cms.columns if 'CMONGO' in c.upper() or 'ONGOING' in c.upper()), None)
-        end_date_col = next((c for c in pat_cms.columns if 'CMENDTC' in c.upper() or 'CMENDAT' in c.upper() or 'END DATE' in c.upper()), None)
-
-        display_columns = [col for col in pat_cms.columns
-                           if col not in exclude_cols
-                           and not col.startswith('_')
-                           and (col != ongoing_col if ongoing_col else True)]
-
-        logger.debug("Using %d columns from CM sheet", len(display_columns))
-
-        # Determine final unique column names for Treeview
-        final_columns = []
-        seen_cols = set()
-        for col in display_columns:
-            base_name = header_map.get(col, col)
-            final_name = base_name
-            counter = 2
-            while final_name in seen_cols:
-                final_name = f"{base_name} ({counter})"
-                counter += 1
-            seen_cols.add(final_name)
-            final_columns.append(final_name)
-
-        # Add Daily Dose column (calculated field)
-        final_columns.append("Daily Dose")
-
-        # Identify columns needed for Daily Dose calculation
-        dose_col = next((c for c in pat_cms.columns if 'CMDOSE' in c.upper() and 'DOSU' not in c.upper()), None)
-        freq_col = next((c for c in pat_cms.columns if 'CMDOSFRQ' in c.upper() and 'OTH' not in c.upper()), None)
-        freq_oth_col = next((c for c in pat_cms.columns if 'CMDOSFRQ_OTH' in c.upper() or 'CMDOSFRQ_OTHER' in c.upper()), None)
-        unit_col = next((c for c in pat_cms.columns if 'CMDOSU' in c.upper() or 'UNIT' in c.upper()), None)
-
-        # Build rows with unique keys
-        final_cm_data = []
-        for _, cm_row in pat_cms.iterrows():
-            row_data = {}
-            is_ongoing = False
-
-            if ongoing_col:
-                ongoing_val = str(cm_row.get(ongoing_col, '')).lower()
-                if ongoing_val in ['yes', 'y', '1', 'true', 'checked']:
-                    is_ongoing = True
-
-            for i, col in enumerate(display_columns):
-                val = cm_row.get(col, '')
-                if pd.isna(val) or str(val).lower() == 'nan':
-                    val = ''
-                else:
-                    val = str(val).strip()
-                    if 'date' in col.lower() or 'dtc' in col.lower() or 'dat' in col.lower():
-                        if 'T' in val:
-                            val = val.split('T')[0]
-                        val = re.sub(r',?\s*time\s*unknown', '', val, flags=re.IGNORECASE).strip()
-
-                if is_ongoing and end_date_col and col == end_date_col:
-                    val = "Ongoing"
-
-                final_key = final_columns[i]
-                row_data[final_key] = val
-
-            # Calculate Daily Dose
-            daily_dose_str = ""
-            try:
-                dose_val = cm_row.get(dose_col, '') if dose_col else ''
-                freq_val = cm_row.get(freq_col, '') if freq_col else ''
-                freq_oth_val = cm_row.get(freq_oth_col, '') if freq_oth_col else ''
-                unit_val = cm_row.get(unit_col, '') if unit_col else ''
-
-                if dose_val and not pd.isna(dose_val) and str(dose_val).lower() not in ['nan', 'none', '']:
-                    single_dose = float(str(dose_val).strip())
-                    multiplier, freq_note, override_dose = self.parse_frequency_multiplier(freq_val, freq_oth_val)
-
-                    if override_dose is not None:
-                        daily = override_dose
-                    elif multiplier is not None:
-                        daily = single_dose * multiplier
-                    else:
-                        daily = None
-
-                    if daily is not None:
-                        if daily == int(daily):
-                            daily_dose_str = str(int(daily))
-                        else:
-                            daily_dose_str = f"{daily:.1f}"
-
-                        if unit_val and not pd.isna(unit_val) and str(unit_val).lower() not in ['nan', 'none', '']:
-                            unit_str = str(unit_val).strip()
-                            if 'milligram' in unit_str.lower():
-                                unit_str = 'mg'
-                            daily_dose_str += f" {unit_str}/day"
-                        else:
-                            daily_dose_str += "/day"
-                    elif freq_note:
-                        daily_dose_str = f"{int(single_dose) if single_dose == int(single_dose) else single_dose} {freq_note}"
-            except (ValueError, TypeError):
-                daily_dose_str = ""
-
-            row_data["Daily Dose"] = daily_dose_str
-
-            if any(v.strip() for v in row_data.values()):
-                final_cm_data.append(row_data)
+        (ongoing_col, dose_col, freq_col, freq_oth_col, unit_col,
+         column_specs, final_columns) = _resolve_cm_columns(tuple(pat_cms.columns))
+
+        daily_doses = self._daily_doses(pat_cms, dose_col, freq_col, freq_oth_col, unit_col)
+
+        if ongoing_col:
+            is_ongoing = pat_cms[ongoing_col].astype(str).str.lower().isin(_ONGOING_VALUES)
+        else:
+            is_ongoing = None
+
+        # Build rows with unique keys, one column at a time
+        cm_columns = {}
+        for col, final_key, is_date, is_end_date in column_specs:
+            text = _clean_text(pat_cms[col])
+            if is_date:
+                text = (text.str.split('T').str[0]
+                        .str.replace(_TIME_UNKNOWN_RE, '', regex=True).str.strip())
+            if is_end_date and is_ongoing is not None:
+                text = text.mask(is_ongoing, "Ongoing")
+            cm_columns[final_key] = text
+        cm_columns["Daily Dose"] = pd.Series(daily_doses, index=pat_cms.index)
+
+        cm_rows = pd.DataFrame(cm_columns, index=pat_cms.index)
+        cm_rows = cm_rows[(cm_rows != '').any(axis=1)]
+        final_cm_data = cm_rows.to_dict('records')
 
         if not final_cm_data:
             messagebox.showinfo("Info", "No valid medications found.")
             return
 
         # Create window
-        win = tk.Toplevel(self.app.root)
-        win.title(f"Concomitant Medications - Patient {pat}")
-        win.geometry("1400x600")
-        win.transient(self.app.root)
-        win.lift()
-        win.focus_force()
+        win = self._setup_toplevel(f"Concomitant Medications - Patient {pat}", "1400x600")
 
         # Store for export
-        self._cm_matrix_df = pd.DataFrame(final_cm_data)
+        self._cm_matrix_rows = final_cm_data
         self._cm_matrix_patient = pat
 
         # Toolbar
-        toolbar = tk.Frame(win, bg="#f4f4f4", pady=5)
+        toolbar = tk.Frame(win, bg=_TOOLBAR_BG, pady=5)
         toolbar.pack(fill=tk.X, side=tk.TOP)
 
-        tk.Label(toolbar, text="Export:", bg="#f4f4f4", font=("Segoe UI", 9)).pack(side=tk.LEFT, padx=(10, 5))
+        tk.Label(toolbar, text="Export:", bg=_TOOLBAR_BG, font=_FONT).pack(side=tk.LEFT, padx=(10, 5))
         tk.Button(toolbar, text="Export XLSX",
-                  command=lambda: self._export_matrix('xlsx', self._cm_matrix_df, self._cm_matrix_patient, "CM_Matrix"),
-                  bg="#27ae60", fg="white", font=("Segoe UI", 9, "bold")).pack(side=tk.LEFT, padx=5)
+                  command=lambda: self._export_matrix('xlsx', pd.DataFrame(self._cm_matrix_rows), self._cm_matrix_patient, "CM_Matrix"),
+                  bg=_BTN_GREEN, fg="white", font=_FONT_BOLD).pack(side=tk.LEFT, padx=5)
         tk.Button(toolbar, text="Export CSV",
-                  command=lambda: self._export_matrix('csv', self._cm_matrix_df, self._cm_matrix_patient, "CM_Matrix"),
-                  bg="#3498db", fg="white", font=("Segoe UI", 9, "bold")).pack(side=tk.LEFT, padx=5)
+                  command=lambda: self._export_matrix('csv', pd.DataFrame(self._cm_matrix_rows), self._cm_matrix_patient, "CM_Matrix"),
+                  bg=_BTN_BLUE, fg="white", font=_FONT_BOLD).pack(side=tk.LEFT, padx=5)
 
-        tk.Label(toolbar, text=f"  |  {len(final_cm_data)} medication(s) found", bg="#f4f4f4", fg="#666",
-                 font=("Segoe UI", 9)).pack(side=tk.LEFT, padx=10)
+        tk.Label(toolbar, text=f"  |  {len(final_cm_data)} medication(s) found", bg=_TOOLBAR_BG, fg=_MUTED_FG,
+                 font=_FONT).pack(side=tk.LEFT, padx=10)
 
         # Tree container
         tree_frame = tk.Frame(win)
         tree_frame.pack(fill=tk.BOTH, expand=True)
 
-        # Filter out completely empty columns
-        non_empty_columns = []
-        for col in final_columns:
-            has_data = any(str(record.get(col, '')).strip() for record in final_cm_data)
-            if has_data:
-                non_empty_columns.append(col)
+        # Filter out completely empty columns (cells are already stripped)
+        has_data = (cm_rows != '').any()
+        non_empty_columns = [col for col in final_columns if has_data[col]]
 
         tree = ttk.Treeview(tree_frame, columns=non_empty_columns, show='headings')
 
@@ -505,19 +663,16 @@ class MatrixDisplay:
             'Daily Dose': 80, 'Route': 60
         }
 
-        for col in non_empty_columns:
-            tree.heading(col, text=col)
-            width = compact_widths.get(col, min(max(len(col) * 8, 60), 150))
-            tree.column(col, width=width, anchor="w", minwidth=40)
-
-        for cm_record in final_cm_data:
-            values = [cm_record.get(col, '') for col in non_empty_columns]
-            tree.insert("", "end", values=values)
+        _setup_columns(tree, [(col, compact_widths.get(col, min(max(len(col) * 8, 60), 150)), "w", 40)
+                              for col in non_empty_columns])
 
         # Scrollbars
         h_scroll = ttk.Scrollbar(tree_frame, orient="horizontal", command=tree.xview)
         v_scroll = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
-        tree.configure(xscrollcommand=h_scroll.set, yscrollcommand=v_scroll.set)
+        tree.configure(xscrollcommand=h_scroll.set)
+
+        row_values = _row_getter(non_empty_columns)
+        _show_rows_lazily(tree, v_scroll, [row_values(cm_record) for cm_record in final_cm_data])
 
         tree.grid(row=0, column=0, sticky="nsew")
         v_scroll.grid(row=0, column=1, sticky="ns")
@@ -526,6 +681,52 @@ class MatrixDisplay:
         tree_frame.grid_rowconfigure(0, weight=1)
         tree_frame.grid_columnconfigure(0, weight=1)
 
+    def _daily_doses(self, pat_cms, dose_col, freq_col, freq_oth_col, unit_col):
+        """Daily Dose text for each CM row, in row order ('' where it cannot be worked out).
+
+        Dose parsing, unit clean-up and the dose arithmetic run column-wise;
+        each distinct frequency pair goes through parse_frequency_multiplier once.
+        """
+        daily_doses = [''] * len(pat_cms)
+        if not dose_col:
+            return daily_doses
+
+        raw = pat_cms[dose_col]
+        text = raw.astype(str)
+        has_dose = raw.notna() & raw.astype(bool) & ~text.str.lower().isin(_BLANK_VALUES)
+        single = pd.to_numeric(text.str.strip().where(has_dose), errors='coerce').to_numpy(dtype=float)
+        positions = np.flatnonzero(~np.isnan(single))
+        if not len(positions):
+            return daily_doses
+        rows = pat_cms.iloc[positions]
+        single = single[positions]
+
+        blank = [''] * len(positions)
+        pairs = list(zip(rows[freq_col] if freq_col else blank,
+                         rows[freq_oth_col] if freq_oth_col else blank))
+        parsed = {pair: self.parse_frequency_multiplier(*pair) for pair in dict.fromkeys(pairs)}
+        multiplier, notes, override = zip(*(parsed[pair] for pair in pairs))
+        multiplier = np.array([np.nan if m is None else m for m in multiplier], dtype=float)
+        override = np.array([np.nan if o is None else o for o in override], dtype=float)
+        daily = np.where(np.isnan(override), single * multiplier, override)
+
+        if unit_col:
+            unit_raw = rows[unit_col]
+            unit_text = unit_raw.astype(str)
+            has_unit = unit_raw.notna() & unit_raw.astype(bool) & ~unit_text.str.lower().isin(_BLANK_VALUES)
+            unit_text = unit_text.str.strip()
+            unit_text = unit_text.mask(unit_text.str.lower().str.contains('milligram', regex=False), 'mg')
+            suffixes = (' ' + unit_text + '/day').where(has_unit, '/day').tolist()
+        else:
+            suffixes = ['/day'] * len(positions)
+
+        for pos, dose, day, note, suffix in zip(positions, single.tolist(), daily.tolist(), notes, suffixes):
+            if day == day:  # not NaN
+                daily_doses[pos] = (str(int(day)) if day.is_integer() else f"{day:.1f}") + suffix
+            elif note:
+                daily_doses[pos] = f"{int(dose) if dose.is_integer() else dose} {note}"
+        return daily_doses
+
     # ------------------------------------------------------------------
     # CM (Concomitant Medications) — from parsed Main sheet data
     # ------------------------------------------------------------------
@@ -596,31 +797,26 @@ class MatrixDisplay:
             messagebox.showinfo("Info", f"No CVC {table_type} data found.")
             return
 
-        win = tk.Toplevel(self.app.root)
-        win.title(f"CVC {table_type} - Patient {pat}")
-        win.geometry("1000x350")
-        win.transient(self.app.root)
-        win.lift()
-        win.focus_force()
+        win = self._setup_toplevel(f"CVC {table_type} - Patient {pat}", "1000x350")
 
         self._cvc_matrix_df = df
         self._cvc_matrix_patient = pat
         self._cvc_matrix_type = table_type
 
         # Toolbar
-        toolbar = tk.Frame(win, bg="#f4f4f4", pady=5)
+        toolbar = tk.Frame(win, bg=_TOOLBAR_BG, pady=5)
         toolbar.pack(fill=tk.X, side=tk.TOP)
 
-        tk.Label(toolbar, text=f"CVC {table_type}", bg="#f4f4f4", font=("Segoe UI", 10, "bold")).pack(side=tk.LEFT, padx=(10, 20))
-        tk.Label(toolbar, text="Export:", bg="#f4f4f4", font=("Segoe UI", 9)).pack(side=tk.LEFT, padx=(10, 5))
+        tk.Label(toolbar, text=f"CVC {table_type}", bg=_TOOLBAR_BG, font=("Segoe UI", 10, "bold")).pack(side=tk.LEFT, padx=(10, 20))
+        tk.Label(toolbar, text="Export:", bg=_TOOLBAR_BG, font=_FONT).pack(side=tk.LEFT, padx=(10, 5))
         tk.Button(toolbar, text="Export XLSX",
                   command=lambda: self._export_matrix('xlsx', self._cvc_matrix_df, self._cvc_matrix_patient,
                                                       f"CVC_{self._cvc_matrix_type}"),
-                  bg="#27ae60", fg="white", font=("Segoe UI", 9, "bold")).pack(side=tk.LEFT, padx=5)
+                  bg=_BTN_GREEN, fg="white", font=_FONT_BOLD).pack(side=tk.LEFT, padx=5)
         tk.Button(toolbar, text="Export CSV",
                   command=lambda: self._export_matrix('csv', self._cvc_matrix_df, self._cvc_matrix_patient,
                                                       f"CVC_{self._cvc_matrix_type}"),
-                  bg="#3498db", fg="white", font=("Segoe UI", 9, "bold")).pack(side=tk.LEFT, padx=5)
+                  bg=_BTN_BLUE, fg="white", font=_FONT_BOLD).pack(side=tk.LEFT, padx=5)
 
         # Tree view
         tree_frame = tk.Frame(win)
@@ -630,13 +826,9 @@ class MatrixDisplay:
 
         tree = ttk.Treeview(tree_frame, columns=display_columns, show='headings')
 
-        for col in display_columns:
-            tree.heading(col, text=col)
-            width = max(len(str(col)) * 10, 80)
-            tree.column(col, width=width, anchor="center", minwidth=60)
+        _setup_columns(tree, [(col, max(len(str(col)) * 10, 80), "center", 60) for col in display_columns])
 
-        for values in df[display_columns].fillna('').values:
-            tree.insert("", "end", values=list(values))
+        _insert_rows(tree, map(tuple, df[display_columns].to_numpy(dtype=object, na_value='')))
 
         h_scroll = ttk.Scrollbar(tree_frame, orient="horizontal", command=tree.xview)
         v_scroll = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
@@ -655,54 +847,13 @@ class MatrixDisplay:
 
     def show_cvh_matrix(self, cvh_data, pat):
         """Display Cardiovascular History data as a structured table."""
-        win = tk.Toplevel(self.app.root)
-        win.title(f"Cardiovascular History - Patient {pat}")
-        win.geometry("800x400")
-        win.transient(self.app.root)
-        win.lift()
-        win.focus_force()
-
-        # Toolbar
-        toolbar = tk.Frame(win, bg="#f4f4f4", pady=5)
-        toolbar.pack(fill=tk.X, side=tk.TOP)
-
-        tk.Label(toolbar, text="Cardiovascular History", bg="#f4f4f4",
-                 font=("Segoe UI", 11, "bold"), fg="#8b0000").pack(side=tk.LEFT, padx=10)
-
-        # Create treeview
-        tree_frame = tk.Frame(win)
-        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        columns = ["#", "Date", "Type of Intervention", "Intervention"]
-        tree = ttk.Treeview(tree_frame, columns=columns, show="headings")
-
-        tree.heading("#", text="#")
-        tree.column("#", width=40, anchor="center")
-        tree.heading("Date", text="Date")
-        tree.column("Date", width=150, anchor="center")
-        tree.heading("Type of Intervention", text="Type of Intervention")
-        tree.column("Type of Intervention", width=150, anchor="center")
-        tree.heading("Intervention", text="Intervention")
-        tree.column("Intervention", width=300, anchor="w")
-
-        for i, record in enumerate(cvh_data, 1):
-            tree.insert("", "end", values=(
-                i,
-                record.get('Date', ''),
-                record.get('Type of Intervention', ''),
-                record.get('Intervention', '')
-            ))
-
-        h_scroll = ttk.Scrollbar(tree_frame, orient="horizontal", command=tree.xview)
-        v_scroll = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
-        tree.configure(xscrollcommand=h_scroll.set, yscrollcommand=v_scroll.set)
-
-        tree.grid(row=0, column=0, sticky="nsew")
-        v_scroll.grid(row=0, column=1, sticky="ns")
-        h_scroll.grid(row=1, column=0, sticky="ew")
-
-        tree_frame.grid_rowconfigure(0, weight=1)
-        tree_frame.grid_columnconfigure(0, weight=1)
+        rows = [(i, record.get('Date', ''), record.get('Type of Intervention', ''), record.get('Intervention', ''))
+                for i, record in enumerate(cvh_data, 1)]
+        self._show_event_table(f"Cardiovascular History - Patient {pat}", "800x400",
+                               "Cardiovascular History", "#8b0000",
+                               [("#", 40, "center"), ("Date", 150, "center"),
+                                ("Type of Intervention", 150, "center"), ("Intervention", 300, "w")],
+                               rows)
 
     # ------------------------------------------------------------------
     # ACT (ACT Lab Results / Heparin)
@@ -710,60 +861,52 @@ class MatrixDisplay:
 
     def show_act_matrix(self, act_events, pat):
         """Display ACT/Heparin data as a chronological table."""
-        win = tk.Toplevel(self.app.root)
-        win.title(f"ACT Lab Results - Patient {pat}")
-        win.geometry("600x400")
-        win.transient(self.app.root)
-        win.lift()
-        win.focus_force()
+        rows = [(i, event.get('Event', ''), event.get('Value', ''), event.get('Time', ''))
+                for i, event in enumerate(act_events, 1)]
+        row_tags = [(_ACT_STATUS_TAG.get(event.get('Status', 'OK'), 'ok'),) for event in act_events]
+        self._show_event_table(f"ACT Lab Results - Patient {pat}", "600x400",
+                               "ACT Lab Results (Chronological)", "#2c3e50",
+                               [("#", 40, "center"), ("Event", 150, "w"),
+                                ("Value", 150, "w"), ("Time", 100, "center")],
+                               rows, row_tags, _ACT_TAG_STYLES)
+
+    def _show_event_table(self, title, geometry, heading, heading_fg, column_specs, rows,
+                          row_tags=None, tag_styles=None):
+        """Display pre-built rows in a titled, read-only Treeview window (CVH, ACT).
+
+        Args:
+            title: window title
+            geometry: window geometry string
+            heading: toolbar heading text, drawn in *heading_fg*
+            column_specs: (column, width, anchor) per column, in display order
+            rows: value tuples, one per row
+            row_tags: optional tag tuple per row, styled by *tag_styles* ({tag: tag_configure options})
+        """
+        win = self._setup_toplevel(title, geometry)
 
         # Toolbar
-        toolbar = tk.Frame(win, bg="#f4f4f4", pady=5)
+        toolbar = tk.Frame(win, bg=_TOOLBAR_BG, pady=5)
         toolbar.pack(fill=tk.X, side=tk.TOP)
 
-        tk.Label(toolbar, text="ACT Lab Results (Chronological)", bg="#f4f4f4",
-                 font=("Segoe UI", 11, "bold"), fg="#2c3e50").pack(side=tk.LEFT, padx=10)
+        tk.Label(toolbar, text=heading, bg=_TOOLBAR_BG,
+                 font=_FONT_TITLE, fg=heading_fg).pack(side=tk.LEFT, padx=10)
 
         # Create treeview
         tree_frame = tk.Frame(win)
         tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-        columns = ["#", "Event", "Value", "Time"]
-        tree = ttk.Treeview(tree_frame, columns=columns, show="headings")
-
-        tree.heading("#", text="#")
-        tree.column("#", width=40, anchor="center")
-        tree.heading("Event", text="Event")
-        tree.column("Event", width=150, anchor="w")
-        tree.heading("Value", text="Value")
-        tree.column("Value", width=150, anchor="w")
-        tree.heading("Time", text="Time")
-        tree.column("Time", width=100, anchor="center")
-
-        # Configure tags for coloring
-        tree.tag_configure('gap', foreground='red', font=('Segoe UI', 9, 'bold'))
-        tree.tag_configure('not_done', foreground='blue', font=('Segoe UI', 9, 'italic'))
-        tree.tag_configure('ok', foreground='black')
-
-        for i, event in enumerate(act_events, 1):
-            status = event.get('Status', 'OK')
-            if status == 'GAP':
-                tag = 'gap'
-            elif status == 'Confirmed':
-                tag = 'not_done'
-            else:
-                tag = 'ok'
+        tree = ttk.Treeview(tree_frame, columns=[col for col, _, _ in column_specs], show="headings")
+        # 20 is ttk's default minwidth
+        _setup_columns(tree, [(col, width, anchor, 20) for col, width, anchor in column_specs])
 
-            tree.insert("", "end", values=(
-                i,
-                event.get('Event', ''),
-                event.get('Value', ''),
-                event.get('Time', '')
-            ), tags=(tag,))
+        for tag, style in (tag_styles or {}).items():
+            tree.tag_configure(tag, **style)
 
         h_scroll = ttk.Scrollbar(tree_frame, orient="horizontal", command=tree.xview)
         v_scroll = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
-        tree.configure(xscrollcommand=h_scroll.set, yscrollcommand=v_scroll.set)
+        tree.configure(xscrollcommand=h_scroll.set)
+
+        _show_rows_lazily(tree, v_scroll, rows, row_tags)
 
         tree.grid(row=0, column=0, sticky="nsew")
         v_scroll.grid(row=0, column=1, sticky="ns")
@@ -781,48 +924,15 @@ class MatrixDisplay:
 
         Mirrors the logic from FUHighlightsExporter for consistency.
         """
-        if not freq_str or str(freq_str).lower() in ['nan', 'none', '']:
+        if not freq_str:
             return 1, "", None
 
+        # Blank, 'nan' and 'none' miss the table and fall through to the default
         freq = str(freq_str).strip().lower()
-
-        if freq in ["once a day", "qd", "od"]:
-            return 1, "", None
-        elif freq in ["twice a day", "bid"]:
-            return 2, "", None
-        elif freq in ["3 times a day", "tid"]:
-            return 3, "", None
-        elif freq in ["4 times a day", "qid"]:
-            return 4, "", None
-        elif freq in ["every other day", "qod"]:
-            return 0.5, "(every 48h)", None
-        elif freq == "as needed":
-            return None, "PRN", None
-        elif freq == "once":
-            return 1, "(single dose)", None
-        elif freq == "other":
-            if freq_other_str and str(freq_other_str).lower() not in ['nan', 'none', '']:
-                other = str(freq_other_str).strip().lower()
-
-                mg_matches = re.findall(r'(\d+(?:\.\d+)?)\s*mg', other)
-                if len(mg_matches) > 1:
-                    total_dose = sum(float(m) for m in mg_matches)
-                    return None, f"({freq_other_str})", total_dose
-
-                if "every other day" in other or "qod" in other:
-                    return 0.5, "(every 48h)", None
-
-                match = re.match(r'q\s*(\d+)\s*h', other)
-                if match:
-                    interval_hours = int(match.group(1))
-                    if interval_hours > 0:
-                        doses_per_day = 24 // interval_hours
-                        return doses_per_day, f"(q{interval_hours}h->{doses_per_day}x/d)", None
-
-                if "continuous" in other:
-                    return None, "(continuous)", None
-
-                return 1, f"({str(freq_other_str).strip()})", None
-            return 1, "", None
+        parsed = _FREQ_TABLE.get(freq)
+        if parsed is not None:
+            return parsed
+        if freq == "other" and freq_other_str:
+            return _parse_other_frequency(str(freq_other_str))
 
         return 1, "", None
@@ -102,6 +102,11 @@ class MilestoneConfig:
         return self.manual_dates.get(patient_id, {}).get(milestone_id)
 
 
+# Explicit formats tried in order before falling back to pandas inference
+_DATE_FORMATS = ("%Y-%m-%d", "%d-%b-%Y", "%d/%m/%Y", "%m/%d/%Y",
+                 "%Y-%m-%d %H:%M:%S", "%d-%b-%Y %H:%M:%S")
+
+
 def _parse_date(val) -> Optional[datetime]:
     """Try to parse a date value from various formats."""
     if pd.isna(val) or val is None:
@@ -109,8 +114,7 @@ def _parse_date(val) -> Optional[datetime]:
     s = str(val).strip()
     if not s or s.lower() in ('nan', 'none', 'nat', ''):
         return None
-    for fmt in ("%Y-%m-%d", "%d-%b-%Y", "%d/%m/%Y", "%m/%d/%Y",
-                "%Y-%m-%d %H:%M:%S", "%d-%b-%Y %H:%M:%S"):
+    for fmt in _DATE_FORMATS:
         try:
             return datetime.strptime(s, fmt)
         except ValueError:
@@ -121,18 +125,42 @@ def _parse_date(val) -> Optional[datetime]:
         return None
 
 
+def _parse_date_column(values: pd.Series) -> pd.Series:
+    """Parse a whole column of date values the way _parse_date parses one.
+
+    Each explicit format is tried column-wise on the values still unparsed;
+    only values matching none of them go through _parse_date one by one.
+    Time zones are dropped, keeping the written wall-clock time.
+    """
+    text = values.astype(str).str.strip()
+    todo = ~(values.isna() | text.str.lower().isin(('nan', 'none', 'nat', ''))).to_numpy()
+    parsed = np.full(len(values), np.datetime64("NaT"), dtype="datetime64[us]")
+    for fmt in _DATE_FORMATS:
+        if not todo.any():
+            break
+        attempt = pd.to_datetime(text[todo], format=fmt, errors="coerce", cache=True).to_numpy()
+        hit = ~np.isnat(attempt)
+        rows = np.flatnonzero(todo)[hit]
+        parsed[rows] = attempt[hit]
+        todo[rows] = False
+
+    for i in np.flatnonzero(todo):
+        dt = _parse_date(text.iat[i])
+        if dt is not None:
+            parsed[i] = pd.Timestamp(dt).tz_localize(None).to_datetime64()
+    return pd.Series(parsed, index=values.index)
+
+
 def _find_column(df: pd.DataFrame, pattern: str) -> Optional[str]:
     """Find a column matching pattern (case-insensitive, partial)."""
     pattern_lower = pattern.lower()
+    lowered = [(col, col.lower()) for col in df.columns]
     # Exact match first
-    for col in df.columns:
-        if col.lower() == pattern_lower:
+    for col, col_lower in lowered:
+        if col_lower == pattern_lower:
             return col
     # Partial match
-    for col in df.columns:
-        if pattern_lower in col.lower():
-            return col
-    return None
+    return next((col for col, col_lower in lowered if pattern_lower in col_lower), None)
 
 
 class PatientTimelineWindow:
@@ -144,6 +172,9 @@ class PatientTimelineWindow:
         self.df_main = df_main
         self.get_screen_failures = get_screen_failures_fn
         self.config = MilestoneConfig()
+        self._column_cache: Dict[str, Optional[str]] = {}  # column_pattern -> df_main column
+        self._date_cache: Dict[str, pd.Series] = {}  # df_main column -> parsed dates
+        self._column_cache_df = None  # df_main the caches were built for
 
         self.win = tk.Toplevel(parent)
         self.win.title("Patient Timeline")
@@ -196,53 +227,67 @@ class PatientTimelineWindow:
         self.summary_frame = tk.Frame(self.notebook, bg="#1e1e2e")
         self.notebook.add(self.summary_frame, text="  Summary  ")
 
-    def _get_patients(self) -> List[Tuple[str, pd.Series]]:
-        """Get patient list, optionally excluding screen failures."""
-        patients = []
+    def _get_patients(self) -> Tuple[pd.Series, pd.Series]:
+        """Get patient IDs, optionally excluding screen failures.
+
+        Returns (ids, mask): *mask* flags the df_main rows kept and *ids*
+        holds the cleaned ID of each kept row, in row order.
+        """
         screen_failures = set()
         if self.exclude_sf_var.get() and self.get_screen_failures:
             screen_failures = set(self.get_screen_failures())
 
-        for _, row in self.df_main.iterrows():
-            pat_id = str(row.get('Screening #', '')).strip()
-            if pat_id.endswith('.0'):
-                pat_id = pat_id[:-2]
-            if not pat_id or pat_id in screen_failures:
-                continue
-            patients.append((pat_id, row))
-        return patients
-
-    def _get_milestone_date(self, row: pd.Series, milestone: dict,
-                             patient_id: str) -> Optional[datetime]:
-        """Get the date for a milestone from the data row or manual entry."""
-        # Manual date takes priority
-        manual = self.config.get_manual_date(patient_id, milestone["id"])
-        if manual:
-            return _parse_date(manual)
-
-        if milestone["type"] == "manual":
-            return None
-
-        # Data-bound: find column and extract date
-        col = _find_column(self.df_main, milestone["column_pattern"])
-        if col and col in row.index:
-            return _parse_date(row[col])
-        return None
+        if 'Screening #' not in self.df_main.columns:
+            mask = pd.Series(False, index=self.df_main.index)
+            return pd.Series([], dtype=object), mask
+
+        raw = self.df_main['Screening #']
+        ids = raw.astype(str).str.strip().str.removesuffix('.0')
+        mask = raw.notna() & (ids != '') & ~ids.isin(screen_failures)
+        return ids[mask], mask
+
+    def _milestone_column(self, pattern: str) -> Optional[str]:
+        """_find_column on df_main, cached per pattern until df_main is replaced."""
+        if self._column_cache_df is not self.df_main:
+            self._column_cache = {}
+            self._date_cache = {}
+            self._column_cache_df = self.df_main
+        if pattern not in self._column_cache:
+            self._column_cache[pattern] = _find_column(self.df_main, pattern)
+        return self._column_cache[pattern]
+
+    def _column_dates(self, col: str) -> pd.Series:
+        """Parsed dates of a df_main column, shared by all views until df_main is replaced."""
+        if col not in self._date_cache:
+            self._date_cache[col] = _parse_date_column(self.df_main[col])
+        return self._date_cache[col]
 
     def _build_timeline_data(self) -> pd.DataFrame:
         """Build a DataFrame: patients (rows) × milestones (columns) with dates."""
-        patients = self._get_patients()
-        milestones = self.config.milestones
-
-        rows = []
-        for pat_id, row in patients:
-            entry = {"Patient": pat_id}
-            for ms in milestones:
-                dt = self._get_milestone_date(row, ms, pat_id)
-                entry[ms["name"]] = dt
-            rows.append(entry)
-
-        return pd.DataFrame(rows) if rows else pd.DataFrame()
+        ids, mask = self._get_patients()
+        if ids.empty:
+            return pd.DataFrame()
+
+        data = {"Patient": ids.to_numpy()}
+        for ms in self.config.milestones:
+            dates = pd.Series(pd.NaT, index=ids.index, dtype="datetime64[us]")
+            if ms["type"] != "manual":
+                # Data-bound: resolve the column once, take the kept rows
+                col = self._milestone_column(ms["column_pattern"])
+                if col:
+                    dates = self._column_dates(col)[mask]
+
+            # Manual dates take priority over data, even when they do not parse
+            manual = {pat_id: pd.Timestamp(_parse_date(dates_by_ms[ms["id"]])).tz_localize(None)
+                      for pat_id, dates_by_ms in self.config.manual_dates.items()
+                      if dates_by_ms.get(ms["id"])}
+            if manual:
+                has_manual = ids.isin(manual.keys())
+                dates = dates.where(~has_manual, ids.map(manual).astype("datetime64[us]"))
+
+            data[ms["name"]] = dates.to_numpy()
+
+        return pd.DataFrame(data)
 
     def _refresh_all(self):
         """Refresh all views."""
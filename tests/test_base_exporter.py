@@ -2,6 +2,12 @@
 import unittest
 import pandas as pd
 import math
+import os
+import tempfile
+import zipfile
+from io import BytesIO
+
+import openpyxl
 
 from base_exporter import BaseExporter
 
@@ -136,6 +142,48 @@ class TestGetPatientRow(unittest.TestCase):
         row = self.exporter.get_patient_row('999-99')
         self.assertIsNone(row)
 
+    def test_duplicate_id_returns_first_row(self):
+        df = pd.DataFrame({'Screening #': ['101-01', '101-01'], 'Name': ['Alice', 'Dup']})
+        self.assertEqual(BaseExporter(df).get_patient_row('101-01')['Name'], 'Alice')
+
+    def test_reassigned_df_main(self):
+        self.exporter.get_patient_row('101-01')
+        self.exporter.df_main = pd.DataFrame({'Screening #': ['103-03'], 'Name': ['Cara']})
+        self.assertIsNone(self.exporter.get_patient_row('101-01'))
+        self.assertEqual(self.exporter.get_patient_row('103-03')['Name'], 'Cara')
+
+
+class TestLoadTemplate(unittest.TestCase):
+    def test_no_template(self):
+        self.assertIsNone(BaseExporter(pd.DataFrame()).load_template())
+
+    def test_missing_file(self):
+        exporter = BaseExporter(pd.DataFrame(), template_path='does_not_exist.xlsx')
+        self.assertIsNone(exporter.load_template())
+
+    def test_file_read_once_fresh_workbook_each_call(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'tmpl.xlsx')
+            wb = openpyxl.Workbook()
+            wb.active['A1'] = 'template'
+            wb.save(path)
+            exporter = BaseExporter(pd.DataFrame(), template_path=path)
+            first = exporter.load_template()
+            os.remove(path)
+            first.active['A1'] = 'changed'
+            second = exporter.load_template()
+        self.assertIsNot(first, second)
+        self.assertEqual(second.active['A1'].value, 'template')
+
+    def test_template_bytes_skip_disk_read(self):
+        buf = BytesIO()
+        wb = openpyxl.Workbook()
+        wb.active['A1'] = 'cached'
+        wb.save(buf)
+        exporter = BaseExporter(pd.DataFrame(), template_path='does_not_exist.xlsx',
+                                template_bytes=buf.getvalue())
+        self.assertEqual(exporter.load_template().active['A1'].value, 'cached')
+
 
 class TestGenerateExport(unittest.TestCase):
     """Test the multi-patient export orchestration."""
@@ -164,6 +212,13 @@ class TestGenerateExport(unittest.TestCase):
             filename_fmt=lambda p: f"{p}_labs.xlsx")
         self.assertEqual(ext, 'zip')
 
+    def test_zip_entries_stored_uncompressed(self):
+        data, ext, pid = self.exporter.generate_export(['101-01', '102-02'])
+        with zipfile.ZipFile(BytesIO(data)) as zf:
+            self.assertEqual(zf.namelist(), ['101-01.xlsx', '102-02.xlsx'])
+            self.assertTrue(all(i.compress_type == zipfile.ZIP_STORED for i in zf.infolist()))
+            self.assertEqual(zf.read('102-02.xlsx'), b'excel_102-02')
+
 
 class _StubExporter(BaseExporter):
     """Stub exporter for testing generate_export."""
@@ -0,0 +1,142 @@
+"""Tests for labs_export — unit resolution and value helpers."""
+import unittest
+import pandas as pd
+from openpyxl import Workbook
+
+from labs_export import LabsExporter, OUT_OF_RANGE_COLOR, DUAL_UNIT_COLORS, _FONT_DUAL_A, _FONT_DUAL_B
+
+
+def _make_df():
+    nan = float('nan')
+    return pd.DataFrame([
+        {
+            'Screening #': 'P1',
+            'TV_PR_SVDTC': '2024-03-05T10:00',
+            'TV_LB_BM_DV_LBDAT_BM': '2024-03-04|2024-03-06',
+            'TV_LB_BMP_DV_LBDAT_BMP': '2024-03-04|2024-03-06',
+            'SBV_LB_BM_LBORRESU_CRP': 'mg/dL',
+            'FU1M_LB_BM_LBORRESU_CRP': 'Other',
+            'FU1M_LB_BM_LBORRESU_OTH_CRP': ' mg/dL ',
+            'TV_LB_BM_DV_LBORRESU_CRP': 'mg/dL|mg/dL|mg/L',
+            'SBV_LB_CBC_LBORRESU_RDW': 'fL',
+            'TV_LB_CBC_DV_LBORRESU_RDW': '%|fL',
+            'SBV_LB_BMP_LBORRESU_SODIUM': '||mmol/L|',
+            'SBV_LB_BMP_LBORRESU_BUN': 'mmol/L',
+            'FU1M_LB_BMP_LBORRESU_BUN': 'mg/dL',
+        },
+        {
+            'Screening #': 'P2',
+            'TV_PR_SVDTC': nan,
+            'TV_LB_BM_DV_LBDAT_BM': nan,
+            'TV_LB_BMP_DV_LBDAT_BMP': nan,
+            'SBV_LB_BM_LBORRESU_CRP': 'nan',
+            'FU1M_LB_BM_LBORRESU_CRP': nan,
+            'FU1M_LB_BM_LBORRESU_OTH_CRP': nan,
+            'TV_LB_BM_DV_LBORRESU_CRP': 'mg/L',
+            'SBV_LB_CBC_LBORRESU_RDW': '-',
+            'TV_LB_CBC_DV_LBORRESU_RDW': nan,
+            'SBV_LB_BMP_LBORRESU_SODIUM': 'mmol/L',
+            'SBV_LB_BMP_LBORRESU_BUN': nan,
+            'FU1M_LB_BMP_LBORRESU_BUN': nan,
+        },
+    ])
+
+
+class TestResolveUnits(unittest.TestCase):
+    def _resolve(self, exporter, df):
+        result = {}
+        for _, row in df.iterrows():
+            pid = row['Screening #']
+            num_days = len(exporter.calculate_day_offsets(row))
+            result[pid] = exporter.resolve_units(row, num_days, pid)
+        return result
+
+    def test_dual_units_for_unconvertible_pair(self):
+        df = _make_df()
+        resolved = self._resolve(LabsExporter(df, None, {}), df)
+        self.assertEqual(resolved['P1'][29]['units'], ['%', 'fl'])
+
+    def test_conflict_without_callback_picks_first_sorted(self):
+        df = _make_df()
+        resolved = self._resolve(LabsExporter(df, None, {}), df)
+        self.assertEqual(resolved['P1'][4], 'mg/dl')
+        self.assertIsNone(resolved['P2'][4])
+
+    def test_pipe_artifacts_and_placeholders_normalized(self):
+        df = _make_df()
+        resolved = self._resolve(LabsExporter(df, None, {}), df)
+        self.assertEqual(resolved['P1'][8], 'mmol/l')
+        self.assertIsNone(resolved['P2'][29])
+
+
+class TestFindLabColumn(unittest.TestCase):
+    def setUp(self):
+        self.exporter = LabsExporter(_make_df(), None, {})
+
+    def test_daily_and_standard_patterns(self):
+        self.assertEqual(self.exporter.find_lab_column("TV_LB_", "BM", "CRP", "LBORRESU"),
+                         'TV_LB_BM_DV_LBORRESU_CRP')
+        self.assertEqual(self.exporter.find_lab_column("SBV_LB_", "BM", "CRP", "LBORRESU"),
+                         'SBV_LB_BM_LBORRESU_CRP')
+
+    def test_missing_column_is_cached(self):
+        self.assertIsNone(self.exporter.find_lab_column("FU6M_LB_", "BM", "CRP", "LBORRES"))
+        self.assertIn(("FU6M_LB_", "BM", "CRP", "LBORRES"), self.exporter.col_cache)
+        self.assertIsNone(self.exporter.find_lab_column("FU6M_LB_", "BM", "CRP", "LBORRES"))
+
+    def test_reassigned_df_main(self):
+        self.assertIsNone(self.exporter.find_lab_column("FU6M_LB_", "BM", "CRP", "LBORRES"))
+        self.exporter.df_main = pd.DataFrame({'Screening #': ['P3'], 'FU6M_LB_BM_LBORRES_CRP': ['4']})
+        self.assertEqual(self.exporter.find_lab_column("FU6M_LB_", "BM", "CRP", "LBORRES"),
+                         'FU6M_LB_BM_LBORRES_CRP')
+        self.assertIsNone(self.exporter.find_lab_column("TV_LB_", "BM", "CRP", "LBORRESU"))
+        self.assertEqual(self.exporter.get_lab_value(self.exporter.df_main.iloc[0].to_dict(),
+                                                     "FU6M_LB_", "BM", "CRP"), '4')
+
+
+class TestConvertValue(unittest.TestCase):
+    def setUp(self):
+        self.exporter = LabsExporter(pd.DataFrame({'Screening #': []}), None, {})
+
+    def test_parameter_specific_factor(self):
+        self.assertEqual(self.exporter.convert_value("1.5", "mg/dL", "mg/L", "CRP"), 15.0)
+
+    def test_generic_factor(self):
+        self.assertEqual(self.exporter.convert_value("0.02", "ng/mL", "ng/L", "TROPONT"), 20.0)
+        self.assertEqual(self.exporter.convert_value("350", "pg/L", "pg/mL", "BNPPRO"), 0.35)
+
+    def test_unknown_pair_returns_input(self):
+        self.assertEqual(self.exporter.convert_value("5", "mmol/L", "mg/dL", "GLUC"), "5")
+
+    def test_same_unit_returns_input(self):
+        self.assertEqual(self.exporter.convert_value("5", "Secs", "sec", "PT"), "5")
+
+    def test_non_numeric_value_returns_input(self):
+        self.assertEqual(self.exporter.convert_value("<0.5", "mg/dL", "mg/L", "CRP"), "<0.5")
+        self.assertEqual(self.exporter.convert_value("2", "mg/dL", "mg/L", "CRP"), 20)
+
+
+class TestColorize(unittest.TestCase):
+    def setUp(self):
+        self.exporter = LabsExporter(pd.DataFrame({'Screening #': []}), None, {})
+        self.cell = Workbook().active['A1']
+        self.dual_fonts = {'%': _FONT_DUAL_A, 'fl': _FONT_DUAL_B}
+
+    def _color(self):
+        return self.cell.font.color.rgb
+
+    def test_out_of_range_takes_precedence(self):
+        self.exporter._colorize(self.cell, 20, '%', (1, 10), self.dual_fonts)
+        self.assertTrue(self._color().endswith(OUT_OF_RANGE_COLOR))
+
+    def test_dual_unit_color_when_in_range(self):
+        self.exporter._colorize(self.cell, 5, 'fl', (1, 10), self.dual_fonts)
+        self.assertTrue(self._color().endswith(DUAL_UNIT_COLORS['unit2']))
+
+    def test_no_range_check_and_unknown_unit_leaves_font(self):
+        self.exporter._colorize(self.cell, 20, None, None, self.dual_fonts)
+        self.assertFalse(self.cell.has_style)
+
+
+if __name__ == '__main__':
+    unittest.main()
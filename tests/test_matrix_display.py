@@ -0,0 +1,115 @@
+"""Tests for matrix_display — cell cleaning, row values, CM columns, frequency and daily dose and xlsx export helpers."""
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+# Mock tkinter before importing the module (not available in headless CI)
+sys.modules.setdefault('tkinter', MagicMock())
+sys.modules.setdefault('tkinter.ttk', MagicMock())
+sys.modules.setdefault('tkinter.messagebox', MagicMock())
+sys.modules.setdefault('tkinter.filedialog', MagicMock())
+
+from matrix_display import (MatrixDisplay, _clean_text, _clean_date_text, _resolve_cm_columns,
+                            _row_getter, _write_xlsx)
+
+
+class TestCleanText(unittest.TestCase):
+    def test_missing_and_nan_become_blank(self):
+        col = pd.Series([None, float('nan'), 'NaN', ' x ', 3.0], dtype=object)
+        self.assertEqual(_clean_text(col).tolist(), ['', '', '', 'x', '3.0'])
+
+    def test_str_dtype(self):
+        col = pd.Series(['a ', None, ''], dtype='str')
+        self.assertEqual(_clean_text(col).tolist(), ['a', '', ''])
+
+
+class TestCleanDateText(unittest.TestCase):
+    def _clean(self, *vals):
+        return _clean_date_text(pd.Series(vals, dtype=object)).tolist()
+
+    def test_iso_time_dropped(self):
+        self.assertEqual(self._clean('2024-05-09T17:40'), ['2024-05-09'])
+
+    def test_trailing_clock_time_dropped(self):
+        self.assertEqual(self._clean('2024-01-02 10:30', 'Jan 5 2024'), ['2024-01-02', 'Jan 5 2024'])
+
+    def test_time_unknown_removed(self):
+        self.assertEqual(self._clean('2024-01-04, time unknown', ''), ['2024-01-04', ''])
+
+
+class TestRowGetter(unittest.TestCase):
+    def test_always_returns_tuples(self):
+        record = {'A': '1', 'B': '2', 'C': '3'}
+        self.assertEqual(_row_getter(['C', 'A'])(record), ('3', '1'))
+        self.assertEqual(_row_getter(['B'])(record), ('2',))
+        self.assertEqual(_row_getter([])(record), ())
+
+
+class TestResolveCmColumns(unittest.TestCase):
+    def test_layout_and_duplicate_headings(self):
+        cols = ('Form SN', 'LOGS_CM_CMTRT', 'LOGS_CM_CMSTDAT', 'LOGS_CM_CMSTDTC', 'LOGS_CM_CMENDTC',
+                'LOGS_CM_CMONGO', 'LOGS_CM_CMDOSE', 'LOGS_CM_CMDOSU', '_internal')
+        ongoing, dose, freq, freq_oth, unit, specs, final = _resolve_cm_columns(cols)
+        self.assertEqual((ongoing, dose, freq, freq_oth, unit),
+                         ('LOGS_CM_CMONGO', 'LOGS_CM_CMDOSE', None, None, 'LOGS_CM_CMDOSU'))
+        self.assertEqual(final, ('Medication', 'Start Date', 'Start Date (2)', 'End Date',
+                                 'Dose', 'Unit', 'Daily Dose'))
+        self.assertEqual(specs[3], ('LOGS_CM_CMENDTC', 'End Date', True, True))
+        self.assertIs(_resolve_cm_columns(cols), _resolve_cm_columns(cols))
+
+
+class TestDailyDoses(unittest.TestCase):
+    def test_dose_frequency_and_unit(self):
+        cms = pd.DataFrame({
+            'LOGS_CM_CMDOSE': ['5', '2.5', '20', 'abc', None, '100'],
+            'LOGS_CM_CMDOSFRQ': ['Twice a day', 'Every other day', 'As needed', 'qd', 'qd', 'Other'],
+            'LOGS_CM_CMDOSFRQ_OTH': ['', '', '', '', '', '50 mg am 25 mg pm'],
+            'LOGS_CM_CMDOSU': ['Milligrams', '', 'mg', 'mg', 'mg', 'mg'],
+        })
+        doses = MatrixDisplay(None)._daily_doses(cms, 'LOGS_CM_CMDOSE', 'LOGS_CM_CMDOSFRQ',
+                                                 'LOGS_CM_CMDOSFRQ_OTH', 'LOGS_CM_CMDOSU')
+        self.assertEqual(doses, ['10 mg/day', '1.2/day', '20 PRN', '', '', '75 mg/day'])
+
+    def test_no_dose_column(self):
+        cms = pd.DataFrame({'LOGS_CM_CMTRT': ['A', 'B']})
+        self.assertEqual(MatrixDisplay(None)._daily_doses(cms, None, None, None, None), ['', ''])
+
+
+class TestParseFrequencyMultiplier(unittest.TestCase):
+    def setUp(self):
+        self.parse = MatrixDisplay(None).parse_frequency_multiplier
+
+    def test_standard_frequencies(self):
+        self.assertEqual(self.parse(' BID '), (2, "", None))
+        self.assertEqual(self.parse('every other day'), (0.5, "(every 48h)", None))
+        self.assertEqual(self.parse('as needed'), (None, "PRN", None))
+        self.assertEqual(self.parse(float('nan')), (1, "", None))
+
+    def test_other_free_text(self):
+        self.assertEqual(self.parse('Other', 'q8h'), (3, "(q8h->3x/d)", None))
+        self.assertEqual(self.parse('Other', 'q 48 h'), (0.5, "(q48h->0.5x/d)", None))
+        self.assertEqual(self.parse('other', '50 mg am 25.5 mg pm'), (None, "(50 mg am 25.5 mg pm)", 75.5))
+        self.assertEqual(self.parse('other', 'Continuous infusion'), (None, "(continuous)", None))
+        self.assertEqual(self.parse('other', ' with meals '), (1, "(with meals)", None))
+        self.assertEqual(self.parse('other', 'nan'), (1, "", None))
+        self.assertEqual(self.parse('other', '  '), (1, "", None))
+
+
+class TestWriteXlsx(unittest.TestCase):
+    def test_round_trip_with_missing_values(self):
+        df = pd.DataFrame({'Dose': [5, None, 2.5], 'Unit': ['mg', None, 'mL']})
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'out.xlsx')
+            _write_xlsx(df, path)
+            back = pd.read_excel(path)
+        self.assertEqual(list(back.columns), ['Dose', 'Unit'])
+        self.assertTrue(back.iloc[1].isna().all())
+        self.assertEqual(back['Unit'].tolist()[::2], ['mg', 'mL'])
+
+
+if __name__ == '__main__':
+    unittest.main()